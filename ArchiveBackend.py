@@ -0,0 +1,332 @@
+import io
+import abc
+import contextlib
+import logging
+import os
+import shutil
+import struct
+import tempfile
+import zipfile
+import tarfile
+import py7zr
+import patoolib
+from unrar import rarfile
+
+logger = logging.getLogger(__name__)
+
+class SubFile(io.RawIOBase):
+    """Read-only window onto a byte range of another file, e.g. a stored member inside a ZIP."""
+
+    def __init__(self, file, start, length):
+        super().__init__()
+        self.file = file
+        self.start = start
+        self.length = length
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = min(len(buffer), self.length - self.position)
+        if count <= 0:
+            return 0
+        self.file.seek(self.start + self.position)
+        data = self.file.read(count)
+        buffer[:len(data)] = data
+        self.position += len(data)
+        return len(data)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += self.length
+        self.position = max(0, offset)
+        return self.position
+
+    def tell(self):
+        return self.position
+
+    def close(self):
+        if not self.closed:
+            self.file.close()
+        super().close()
+
+
+class ArchiveBackend(abc.ABC):
+    kind = None
+    streamable = False  # Can read the archive from a file object instead of a path
+
+    def __init__(self, file_name, opener=None):
+        self.file_name = file_name
+        self.opener = opener  # Returns a fresh binary file object, for archives nested inside other archives
+
+    @classmethod
+    def can_open(cls, file_name):
+        # file_name may also be an open file object when probing a nested archive
+        return False
+
+    def open_source(self):
+        return self.opener() if self.opener is not None else open(self.file_name, 'rb')
+
+    def member_opener(self, filename):
+        # Opener for a member that can be read in place without decompressing it, else None
+        return None
+
+    @abc.abstractmethod
+    def list(self):
+        # (filename, file_size, is_dir, offset) rows, in archive order
+        pass
+
+    @abc.abstractmethod
+    def read(self, filename):
+        pass
+
+    @abc.abstractmethod
+    def extract(self, filenames, dest_dir):
+        # Extract only the given members below dest_dir, keeping their paths
+        pass
+
+    def close(self):
+        pass
+
+
+class ZipBackend(ArchiveBackend):
+    kind = 'zip'
+    streamable = True
+
+    def __init__(self, file_name, opener=None):
+        super().__init__(file_name, opener)
+        self.zip_ref = None
+        self.source_file = None
+
+    @classmethod
+    def can_open(cls, file_name):
+        return zipfile.is_zipfile(file_name)
+
+    def archive(self):
+        # The central directory is parsed once and kept for the lifetime of the viewer
+        if self.zip_ref is None:
+            if self.opener is not None:
+                self.source_file = self.opener()  # ZipFile leaves passed-in files open
+            self.zip_ref = zipfile.ZipFile(self.source_file or self.file_name, 'r')
+        return self.zip_ref
+
+    def list(self):
+        return [(info.filename, info.file_size, info.is_dir(), info.header_offset) for info in self.archive().infolist()]
+
+    def read(self, filename):
+        return self.archive().read(filename)
+
+    def extract(self, filenames, dest_dir):
+        zip_ref = self.archive()
+        for filename in filenames:
+            zip_ref.extract(filename, dest_dir)
+
+    def member_opener(self, filename):
+        # Stored members are plain byte ranges of the archive, so a nested archive can be read through a
+        # window onto its parent instead of being copied out
+        info = self.archive().getinfo(filename)
+        if info.compress_type != zipfile.ZIP_STORED or info.flag_bits & 0x1:
+            return None
+        with self.open_source() as file:
+            file.seek(info.header_offset)
+            header = file.read(30)
+        if len(header) < 30 or header[:4] != b'PK\x03\x04':
+            return None
+        name_length, extra_length = struct.unpack('<HH', header[26:30])
+        start = info.header_offset + 30 + name_length + extra_length
+        return lambda: io.BufferedReader(SubFile(self.open_source(), start, info.file_size))
+
+    def close(self):
+        if self.zip_ref is not None:
+            self.zip_ref.close()
+            self.zip_ref = None
+        if self.source_file is not None:
+            self.source_file.close()
+            self.source_file = None
+
+
+class RarBackend(ArchiveBackend):
+    kind = 'rar'
+
+    @classmethod
+    def can_open(cls, file_name):
+        return rarfile.is_rarfile(file_name)
+
+    def list(self):
+        with rarfile.RarFile(self.file_name, 'r') as rar_ref:
+            return [(info.filename, info.file_size, False, -1) for info in rar_ref.infolist()]
+
+    def read(self, filename):
+        with rarfile.RarFile(self.file_name, 'r') as rar_ref:
+            return rar_ref.read(filename)
+
+    def extract(self, filenames, dest_dir):
+        # A single pass over the archive; extracting members one by one would decode solid blocks repeatedly
+        with rarfile.RarFile(self.file_name, 'r') as rar_ref:
+            rar_ref.extractall(dest_dir, members=list(filenames))
+
+
+class SevenZipBackend(ArchiveBackend):
+    kind = '7z'
+    streamable = True
+
+    @classmethod
+    def can_open(cls, file_name):
+        if py7zr.is_7zfile(file_name):
+            return True
+        if not isinstance(file_name, str):
+            return False
+        # 7z signature at the start of the file, e.g. some self-extracting EXEs
+        with open(file_name, 'rb') as f:
+            return f.read(6) == b'7z\xbc\xaf\x27\x1c'
+
+    @contextlib.contextmanager
+    def open_archive(self):
+        with contextlib.ExitStack() as stack:
+            source = self.file_name if self.opener is None else stack.enter_context(self.opener())
+            with py7zr.SevenZipFile(source, 'r') as sz_ref:
+                yield sz_ref
+
+    def list(self):
+        with self.open_archive() as sz_ref:
+            return [(info.filename, info.uncompressed, info.is_directory, -1) for info in sz_ref.list()]
+
+    def read(self, filename):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            self.extract([filename], temp_dir)
+            with open(os.path.join(temp_dir, filename), 'rb') as file:
+                return file.read()
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def extract(self, filenames, dest_dir):
+        # One call for all targets, so every solid block is decoded at most once
+        with self.open_archive() as sz_ref:
+            sz_ref.extract(dest_dir, list(filenames))
+
+
+class TarBackend(ArchiveBackend):
+    kind = 'tar'
+    streamable = True
+
+    @classmethod
+    def can_open(cls, file_name):
+        return tarfile.is_tarfile(file_name)
+
+    @contextlib.contextmanager
+    def open_archive(self):
+        # tarfile and py7zr leave passed-in file objects open, so those are closed here
+        with contextlib.ExitStack() as stack:
+            if self.opener is None:
+                tar_ref = tarfile.open(self.file_name, 'r:*')
+            else:
+                tar_ref = tarfile.open(fileobj=stack.enter_context(self.opener()), mode='r:*')
+            with tar_ref:
+                yield tar_ref
+
+    def list(self):
+        with self.open_archive() as tar_ref:
+            return [(info.name, info.size, info.isdir(), info.offset) for info in tar_ref.getmembers()]
+
+    def read(self, filename):
+        with self.open_archive() as tar_ref:
+            with tar_ref.extractfile(tar_ref.getmember(filename)) as file:
+                return file.read()
+
+    def extract(self, filenames, dest_dir):
+        wanted = set(filenames)
+        with self.open_archive() as tar_ref:
+            # Walk the members in archive order so compressed tars are decompressed in a single pass
+            for member in tar_ref:
+                if member.name in wanted:
+                    # Refuses absolute paths, '..' and links leading outside dest_dir, as the tar tool does
+                    tar_ref.extract(member, dest_dir, filter='data')
+
+
+class PatoolBackend(ArchiveBackend):
+    # Last resort for formats only the external tools understand. They can't pick single members, so the
+    # archive is unpacked once per viewer and members are served from that copy.
+    kind = 'generic'
+
+    def __init__(self, file_name, opener=None):
+        super().__init__(file_name)
+        self.unpacked_dir = None
+
+    @classmethod
+    def can_open(cls, file_name):
+        return True
+
+    def list(self):
+        return [(file_path, 0, file_path.endswith('/'), -1) for file_path in patoolib.list_archive(self.file_name)]
+
+    def unpacked(self):
+        if self.unpacked_dir is None:
+            unpacked_dir = tempfile.mkdtemp()
+            try:
+                patoolib.extract_archive(self.file_name, outdir=unpacked_dir, interactive=False)
+            except Exception:
+                shutil.rmtree(unpacked_dir, ignore_errors=True)
+                raise
+            self.unpacked_dir = unpacked_dir
+        return self.unpacked_dir
+
+    def read(self, filename):
+        with open(os.path.join(self.unpacked(), filename), 'rb') as file:
+            return file.read()
+
+    def extract(self, filenames, dest_dir):
+        for filename in filenames:
+            target = os.path.join(dest_dir, filename)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copy2(os.path.join(self.unpacked(), filename), target)
+
+    def close(self):
+        if self.unpacked_dir is not None:
+            shutil.rmtree(self.unpacked_dir, ignore_errors=True)
+            self.unpacked_dir = None
+
+
+BACKENDS = {backend.kind: backend for backend in (ZipBackend, RarBackend, SevenZipBackend, TarBackend, PatoolBackend)}
+
+EXTENSION_KINDS = {
+    '.zip': 'zip',
+    '.jar': 'zip',  # JAR files are essentially ZIP files
+    '.war': 'zip',
+    '.ear': 'zip',
+    '.apk': 'zip',
+    '.aar': 'zip',
+    '.rar': 'rar',
+    '.7z': '7z',
+    '.tar': 'tar',
+}
+
+def open_backend(file_name, kind=None, opener=None):
+    # The format is settled once when the archive is opened: the hinted format first, then whatever the
+    # file's signature matches, then the external tools. With an opener only the backends that can read
+    # from a file object are tried, and None is returned if none of them matches.
+    if kind is None:
+        kind = EXTENSION_KINDS.get(os.path.splitext(file_name)[1].lower())
+    candidates = [BACKENDS[kind]] if kind in BACKENDS else []
+    candidates += [backend for backend in BACKENDS.values() if backend not in candidates]
+    for backend in candidates:
+        if opener is not None and not backend.streamable:
+            continue
+        try:
+            if opener is None:
+                if backend.can_open(file_name):
+                    return backend(file_name)
+            else:
+                with opener() as file:
+                    matched = backend.can_open(file)
+                if matched:
+                    return backend(file_name, opener)
+        except Exception as e:
+            logger.warning("Archive probe %s failed: %s", backend.__name__, e)
+    return PatoolBackend(file_name) if opener is None else None
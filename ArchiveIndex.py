@@ -0,0 +1,168 @@
+import sys
+from array import array
+
+IS_DIR = 1  # Entry is a folder
+EXPLICIT = 2  # Entry was listed by the archive itself rather than implied by a path
+NESTED = 4  # Entry is a file that is itself an archive and can be browsed in place
+LOADED = 8  # The listing of a NESTED entry has been grafted below it
+
+NESTED_EXTENSIONS = {'zip', 'jar', 'war', 'ear', 'apk', 'aar', 'rar', '7z', 'tar'}
+
+class ArchiveIndex:
+    """Flat, array-backed tree of archive entries; entry 0 is the root folder."""
+
+    def __init__(self):
+        self.names = [""]  # Interned path components
+        self.parents = array('l', [-1])
+        self.sizes = array('q', [0])
+        self.offsets = array('q', [0])  # Position of the member inside the archive, -1 when unknown
+        self.flags = array('B', [IS_DIR])
+        self.child_maps = {0: {}}  # folder entry -> {name: child entry}
+        self.sorted_children = {}  # folder entry -> array of children, folders first, built on demand
+        self.dir_cache = {}  # folder path -> entry, only while building
+
+    @classmethod
+    def from_entries(cls, entries):
+        index = cls()
+        for entry in entries:
+            index.add(*entry)
+        index.dir_cache = {}
+        return index
+
+    def __len__(self):
+        return len(self.names)
+
+    def mark_loaded(self, entry):
+        # Also used when a nested archive could not be opened, so it is shown as an empty leaf
+        self.flags[entry] |= LOADED
+
+    def graft(self, entry, entries):
+        # Hang the listing of a nested archive below its member entry
+        self.child_maps.setdefault(entry, {})
+        self.dir_cache = {}
+        for row in entries:
+            self.add(*row, root=entry)
+        self.dir_cache = {}
+        self.mark_loaded(entry)
+        self.sorted_children.pop(entry, None)
+
+    def add(self, filename, file_size, is_dir, offset=-1, root=0):
+        head, sep, name = filename.rpartition('/')
+        if sep and not name:
+            # Trailing slash, the path names a folder
+            head, sep, name = head.rpartition('/')
+            is_dir = True
+            if not sep and not name:
+                return root
+        if not sep:
+            parent = root
+        else:
+            # Archives list members grouped by folder, so most lookups of the parent path are a cache hit
+            parent = self.dir_cache.get(head)
+            if parent is None:
+                parent = root
+                for part in head.split('/'):
+                    parent = self.child(parent, part, create=True)
+                self.dir_cache[head] = parent
+        entry = self.child(parent, name, create=True, is_dir=is_dir)
+        self.flags[entry] |= EXPLICIT
+        if not is_dir:
+            self.sizes[entry] = file_size
+            self.offsets[entry] = offset
+            if name.rpartition('.')[2].lower() in NESTED_EXTENSIONS:
+                self.flags[entry] |= NESTED
+        return entry
+
+    def child(self, parent, name, create=False, is_dir=True):
+        children = self.child_maps.get(parent)
+        entry = children.get(name) if children is not None else None
+        if entry is not None or not create:
+            return entry
+        entry = len(self.names)
+        self.names.append(sys.intern(name))
+        self.parents.append(parent)
+        self.sizes.append(0)
+        self.offsets.append(-1)
+        self.flags.append(IS_DIR if is_dir else 0)
+        if is_dir:
+            self.child_maps[entry] = {}
+        if children is None:
+            # A path used a file entry as a folder; promote it so nothing gets lost
+            children = self.child_maps[parent] = {}
+            self.flags[parent] |= IS_DIR
+        children[name] = entry
+        self.sorted_children.pop(parent, None)
+        return entry
+
+    def is_dir(self, entry):
+        return bool(self.flags[entry] & IS_DIR)
+
+    def is_nested(self, entry):
+        return bool(self.flags[entry] & NESTED)
+
+    def can_have_children(self, entry):
+        return bool(self.flags[entry] & (IS_DIR | NESTED))
+
+    def needs_loading(self, entry):
+        return self.flags[entry] & (NESTED | LOADED) == NESTED
+
+    def has_children(self, entry):
+        if self.needs_loading(entry):
+            return True  # Not opened yet, assume there is something inside
+        return bool(self.child_maps.get(entry))
+
+    def container(self, entry):
+        # The NESTED entry whose archive holds entry, or 0 for members of the outer archive
+        entry = self.parents[entry]
+        while entry > 0 and not self.flags[entry] & NESTED:
+            entry = self.parents[entry]
+        return max(entry, 0)
+
+    def children(self, entry):
+        # Folders first, then files, each sorted case-insensitively; computed once per folder
+        ordered = self.sorted_children.get(entry)
+        if ordered is None:
+            children = self.child_maps.get(entry, {})
+            ordered = array('l', sorted(children.values(),
+                                        key=lambda child: (not self.flags[child] & IS_DIR, self.names[child].lower())))
+            self.sorted_children[entry] = ordered
+        return ordered
+
+    def path(self, entry, stop=0):
+        # Path of entry below stop; paths inside nested archives include the nested member names
+        parts = []
+        while entry > stop:
+            parts.append(self.names[entry])
+            entry = self.parents[entry]
+        return '/'.join(reversed(parts))
+
+    def member_path(self, entry):
+        # Path of entry inside the archive that actually contains it
+        return self.path(entry, self.container(entry))
+
+    def lookup(self, filename):
+        entry = 0
+        for part in filename.rstrip('/').split('/'):
+            entry = self.child(entry, part)
+            if entry is None:
+                return None
+        return entry
+
+    def file_info(self, entry):
+        return {
+            'entry': entry,
+            'filename': self.member_path(entry),
+            'file_size': self.sizes[entry],
+            'is_dir': self.is_dir(entry),
+            'offset': self.offsets[entry],
+        }
+
+    def files_under(self, entry):
+        # Every file in the subtree of entry, iteratively so deep archives can't hit the recursion limit
+        stack = [entry]
+        while stack:
+            entry = stack.pop()
+            if self.is_dir(entry):
+                stack.extend(self.child_maps.get(entry, {}).values())
+            else:
+                yield entry
@@ -0,0 +1,135 @@
+import os
+from PyQt6.QtCore import Qt, QAbstractItemModel, QModelIndex
+from PyQt6.QtGui import QIcon
+
+FETCH_BATCH_SIZE = 2000  # Children materialized per fetchMore call
+
+class FolderNode:
+    # Only folders the view has asked about get a node; files are plain entries of the ArchiveIndex
+    __slots__ = ('entry', 'parent', 'row', 'children', 'fetched', 'subfolders')
+
+    def __init__(self, entry, parent, row):
+        self.entry = entry
+        self.parent = parent
+        self.row = row
+        self.children = None  # Sorted child entries, looked up on first fetch
+        self.fetched = 0  # Number of children exposed to the view so far
+        self.subfolders = {}  # row -> FolderNode
+
+
+class ArchiveModel(QAbstractItemModel):
+    icon_cache = {}  # extension -> QIcon or None, shared by every archive view
+
+    def __init__(self, archive_index, format_size, nested_loader=None, parent=None):
+        super().__init__(parent)
+        self.archive_index = archive_index
+        self.nested_loader = nested_loader  # Called with a NESTED entry the first time it is expanded
+        self.root = FolderNode(0, None, 0)
+        self.format_size = format_size
+        self.checked = set()
+
+    def folderNode(self, index):
+        # The internal pointer of an index is the FolderNode of its parent
+        if not index.isValid():
+            return self.root
+        parent = index.internalPointer()
+        node = parent.subfolders.get(index.row())
+        if node is None:
+            node = parent.subfolders[index.row()] = FolderNode(parent.children[index.row()], parent, index.row())
+        return node
+
+    def entry(self, index):
+        return index.internalPointer().children[index.row()] if index.isValid() else 0
+
+    def index(self, row, column, parent=QModelIndex()):
+        node = self.folderNode(parent)
+        if not 0 <= row < node.fetched:
+            return QModelIndex()
+        return self.createIndex(row, column, node)
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        node = index.internalPointer()
+        if node is self.root:
+            return QModelIndex()
+        return self.createIndex(node.row, 0, node.parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0 or not self.archive_index.can_have_children(self.entry(parent)):
+            return 0
+        return self.folderNode(parent).fetched
+
+    def columnCount(self, parent=QModelIndex()):
+        return 2
+
+    def hasChildren(self, parent=QModelIndex()):
+        return self.archive_index.has_children(self.entry(parent))
+
+    def canFetchMore(self, parent):
+        if not self.archive_index.can_have_children(self.entry(parent)):
+            return False
+        node = self.folderNode(parent)
+        return node.children is None or node.fetched < len(node.children)
+
+    def fetchMore(self, parent):
+        node = self.folderNode(parent)
+        if node.children is None:
+            if self.archive_index.needs_loading(node.entry) and self.nested_loader is not None:
+                self.nested_loader(node.entry)
+            node.children = self.archive_index.children(node.entry)
+        count = min(FETCH_BATCH_SIZE, len(node.children) - node.fetched)
+        if count <= 0:
+            return
+        self.beginInsertRows(parent, node.fetched, node.fetched + count - 1)
+        node.fetched += count
+        self.endInsertRows()
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return ["File Name", "Size"][section]
+        return None
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid() and index.column() == 0 and not self.archive_index.is_dir(self.entry(index)):
+            flags |= Qt.ItemFlag.ItemIsUserCheckable
+        return flags
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        archive_index = self.archive_index
+        entry = self.entry(index)
+        is_dir = archive_index.is_dir(entry)
+        if role == Qt.ItemDataRole.DisplayRole:
+            if index.column() == 0:
+                return archive_index.names[entry]
+            return "" if is_dir else self.format_size(archive_index.sizes[entry])
+        if is_dir or index.column() != 0:
+            return None
+        if role == Qt.ItemDataRole.CheckStateRole:
+            return Qt.CheckState.Checked if entry in self.checked else Qt.CheckState.Unchecked
+        if role == Qt.ItemDataRole.DecorationRole:
+            return self.icon(os.path.splitext(archive_index.names[entry])[1][1:])
+        if role == Qt.ItemDataRole.UserRole:
+            return archive_index.file_info(entry)
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if role != Qt.ItemDataRole.CheckStateRole or not index.isValid():
+            return False
+        if Qt.CheckState(value) == Qt.CheckState.Checked:
+            self.checked.add(self.entry(index))
+        else:
+            self.checked.discard(self.entry(index))
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    @classmethod
+    def icon(cls, extension):
+        # Icons are loaded once per extension instead of once per entry
+        if extension not in cls.icon_cache:
+            icon_path = f"icons/{extension}.png"
+            cls.icon_cache[extension] = QIcon(icon_path) if os.path.exists(icon_path) else None
+        return cls.icon_cache[extension]
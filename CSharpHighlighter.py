@@ -0,0 +1,20 @@
+from CompiledHighlighter import CompiledHighlighter
+
+class CSharpHighlighter(CompiledHighlighter):
+    keywords = ["abstract", "as", "async", "await", "base", "bool", "break", "byte", "case", "catch", "char",
+                "checked", "class", "const", "continue", "decimal", "default", "delegate", "do", "double", "dynamic",
+                "else", "enum", "event", "explicit", "extern", "false", "finally", "fixed", "float", "for", "foreach",
+                "get", "goto", "if", "implicit", "in", "init", "int", "interface", "internal", "is", "lock", "long",
+                "namespace", "new", "null", "object", "operator", "out", "override", "params", "partial", "private",
+                "protected", "public", "readonly", "record", "ref", "return", "sbyte", "sealed", "set", "short",
+                "sizeof", "stackalloc", "static", "string", "struct", "switch", "this", "throw", "true", "try",
+                "typeof", "uint", "ulong", "unchecked", "unsafe", "ushort", "using", "var", "virtual", "void",
+                "volatile", "when", "where", "while", "yield"]
+    token_rules = [
+        (r'\b[0-9]+(?:\.[0-9]+)?[fFdDmMuUlL]?\b', 'number'),
+        (r'\b[A-Za-z_][A-Za-z0-9_]*(?=\s*\()', 'function'),
+        (r'^\s*#\s*[a-z]+', 'keyword'),  # Preprocessor directives
+    ]
+    string_quotes = ['"', "'"]
+    line_comment = '//'
+    multiline = [('/*', '*/', 'comment'), ('@"', '"', 'string')]  # Verbatim strings may span lines
@@ -0,0 +1,169 @@
+from PyQt6.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor, QFont
+from PyQt6.QtCore import QRegularExpression
+
+# Format name -> (color, bold)
+FORMATS = {
+    'keyword': ("#569CD6", True),
+    'string': ("#CE9178", False),
+    'comment': ("#6A9955", False),
+    'number': ("#B5CEA8", False),
+    'function': ("#DCDCAA", False),
+    'tag': ("#569CD6", False),
+    'attribute': ("#9CDCFE", False),
+}
+
+def char_format(name):
+    color, bold = FORMATS[name]
+    text_format = QTextCharFormat()
+    text_format.setForeground(QColor(color))
+    if bold:
+        text_format.setFontWeight(QFont.Weight.Bold)
+    return text_format
+
+def compile_expression(pattern):
+    expression = QRegularExpression(pattern)
+    expression.optimize()
+    return expression
+
+def utf16_length(text):
+    # Qt positions count UTF-16 code units, Python strings count code points
+    return len(text.encode('utf-16-le')) // 2
+
+def layered(ranges):
+    # Later ranges win where they overlap earlier ones, like repeated setFormat calls; returns disjoint ranges
+    segments = []
+    for start, length, text_format in ranges:
+        end = start + length
+        if length <= 0:
+            continue
+        kept = []
+        for segment_start, segment_end, segment_format in segments:
+            if segment_end <= start or segment_start >= end:
+                kept.append((segment_start, segment_end, segment_format))
+                continue
+            if segment_start < start:
+                kept.append((segment_start, start, segment_format))
+            if segment_end > end:
+                kept.append((end, segment_end, segment_format))
+        kept.append((start, end, text_format))
+        segments = kept
+    segments.sort(key=lambda segment: segment[0])
+    return [(start, end - start, text_format) for start, end, text_format in segments]
+
+
+class Lexer:
+    """Compiled form of a language definition; highlights one block at a time given the state the previous one left.
+
+    States: 0 is plain code, n > 0 means the block ends inside the n-th multi-line construct of the language.
+    """
+
+    def __init__(self, definition):
+        self.rules = []
+        if definition.keywords:
+            pattern = r'\b(?:' + '|'.join(definition.keywords) + r')\b'
+            if definition.ignore_case:
+                pattern = '(?i)' + pattern
+            self.rules.append((compile_expression(pattern), char_format('keyword')))
+        for pattern, name in definition.token_rules:
+            self.rules.append((compile_expression(pattern), char_format(name)))
+
+        # Strings and comments are found by one left-to-right scan, so a quote inside a comment or a comment
+        # marker inside a string is never mistaken for the start of something else
+        alternatives = []
+        self.kinds = []  # Per capture group: ('multiline', index), ('line', None) or ('string', None)
+        self.closers = []
+        self.multiline_formats = []
+        multiline = sorted(enumerate(definition.multiline), key=lambda item: -len(item[1][0]))
+        for index, (opener, closer, name) in multiline:
+            alternatives.append(QRegularExpression.escape(opener))
+            self.kinds.append(('multiline', index))
+        for index, (opener, closer, name) in enumerate(definition.multiline):
+            self.closers.append(compile_expression(QRegularExpression.escape(closer)))
+            self.multiline_formats.append(char_format(name))
+        if definition.line_comment:
+            alternatives.append(f'(?:{definition.line_comment})')
+            self.kinds.append(('line', None))
+        for quote in definition.string_quotes:
+            quote = QRegularExpression.escape(quote)
+            # Unterminated strings run to the end of the line
+            alternatives.append(f'{quote}(?:[^{quote}\\\\]|\\\\.)*{quote}?')
+            self.kinds.append(('string', None))
+        self.region = compile_expression('|'.join(f'({alternative})' for alternative in alternatives)) \
+            if alternatives else None
+        self.string_format = char_format('string')
+        self.comment_format = char_format('comment')
+
+    def highlight(self, text, state=0, tokens=True):
+        # Returns disjoint (start, length, format) ranges in UTF-16 units and the state for the next block;
+        # tokens=False only works out the state
+        length = utf16_length(text)
+        ranges = []
+        if tokens:
+            for expression, text_format in self.rules:
+                it = expression.globalMatch(text)
+                while it.hasNext():
+                    match = it.next()
+                    ranges.append((match.capturedStart(), match.capturedLength(), text_format))
+
+        position = 0
+        if state > 0:
+            match = self.closers[state - 1].match(text)
+            if not match.hasMatch():
+                ranges.append((0, length, self.multiline_formats[state - 1]))
+                return layered(ranges), state
+            position = match.capturedEnd()
+            ranges.append((0, position, self.multiline_formats[state - 1]))
+        state = 0
+
+        while self.region is not None:
+            match = self.region.match(text, position)
+            if not match.hasMatch():
+                break
+            start = match.capturedStart()
+            group = next(group for group in range(1, len(self.kinds) + 1) if match.capturedStart(group) >= 0)
+            kind, index = self.kinds[group - 1]
+            if kind == 'line':
+                ranges.append((start, length - start, self.comment_format))
+                break
+            if kind == 'string':
+                ranges.append((start, match.capturedLength(), self.string_format))
+                position = match.capturedEnd()
+                continue
+            close = self.closers[index].match(text, match.capturedEnd())
+            if not close.hasMatch():
+                ranges.append((start, length - start, self.multiline_formats[index]))
+                state = index + 1
+                break
+            ranges.append((start, close.capturedEnd() - start, self.multiline_formats[index]))
+            position = close.capturedEnd()
+        return layered(ranges), state
+
+
+class CompiledHighlighter(QSyntaxHighlighter):
+    """Base for the language highlighters, which only declare their tokens; the Lexer is built once per class.
+
+    Keywords, then token_rules are applied in order, later ones winning; strings and comments override both.
+    """
+
+    keywords = []  # Regex fragments, joined into a single \b(?:...)\b alternation
+    ignore_case = False  # For the keywords
+    token_rules = []  # (pattern, format name) applied after the keywords
+    string_quotes = []  # Single-line strings with backslash escapes
+    line_comment = None  # Regex fragment starting a comment that runs to the end of the line
+    multiline = []  # (opener, closer, format name) constructs that may span blocks
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.compiled_lexer = self.lexer()
+
+    @classmethod
+    def lexer(cls):
+        if 'compiled' not in cls.__dict__:
+            cls.compiled = Lexer(cls)
+        return cls.compiled
+
+    def highlightBlock(self, text):
+        ranges, state = self.compiled_lexer.highlight(text, max(self.previousBlockState(), 0))
+        for start, length, text_format in ranges:
+            self.setFormat(start, length, text_format)
+        self.setCurrentBlockState(state)
@@ -0,0 +1,108 @@
+import os
+import hashlib
+import logging
+import threading
+
+CACHE_DIR_NAME = "ModernFileViewer"
+DEFAULT_MAX_MB = 512
+SAMPLE_SIZE = 64 * 1024  # Bytes hashed from the head and the tail of a file
+
+logger = logging.getLogger(__name__)
+
+def cache_root():
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, CACHE_DIR_NAME)
+
+def file_key(file_name):
+    # Path, mtime and size catch almost every change; sampling the head and tail guards against
+    # files rewritten in place with the same size and timestamp, without reading the whole file
+    st = os.stat(file_name)
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"{os.path.abspath(file_name)}\0{st.st_mtime_ns}\0{st.st_size}".encode('utf-8', 'surrogatepass'))
+    with open(file_name, 'rb') as f:
+        h.update(f.read(SAMPLE_SIZE))
+        if st.st_size > SAMPLE_SIZE:
+            f.seek(max(SAMPLE_SIZE, st.st_size - SAMPLE_SIZE))
+            h.update(f.read(SAMPLE_SIZE))
+    return h.hexdigest()
+
+
+class DiskCache:
+    def __init__(self, root=None, max_bytes=None):
+        self.root = root or cache_root()
+        if max_bytes is None:
+            max_bytes = int(os.environ.get('MODERNFILEVIEWER_CACHE_MB', DEFAULT_MAX_MB)) * 1024 * 1024
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.used_bytes = None  # Measured lazily on the first write
+
+    def entry_path(self, key, kind):
+        name = hashlib.blake2b(f"{key}:{kind}".encode('utf-8'), digest_size=20).hexdigest()
+        return os.path.join(self.root, name[:2], name)
+
+    def get(self, key, kind):
+        path = self.entry_path(key, kind)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)  # Bump the modification time so eviction is least-recently-used
+            return data
+        except OSError:
+            return None
+
+    def put(self, key, kind, data):
+        path = self.entry_path(key, kind)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            replaced_size = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(temp_path, path)
+        except OSError as e:
+            # The cache is an optimisation, so a full or read-only disk only costs the speed-up
+            logger.warning("Failed to write cache entry: %s", e)
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+        with self.lock:
+            if self.used_bytes is None:
+                self.used_bytes = sum(size for _, size, _ in self.entries())
+            else:
+                self.used_bytes += len(data) - replaced_size
+            if self.used_bytes > self.max_bytes:
+                self.evict()
+
+    def entries(self):
+        for dir_entry in os.scandir(self.root) if os.path.isdir(self.root) else []:
+            if not dir_entry.is_dir():
+                continue
+            for entry in os.scandir(dir_entry.path):
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                yield entry.path, st.st_size, st.st_mtime
+
+    def evict(self):
+        # Remove the least recently used entries until the cache is back to 90% of its budget
+        target = self.max_bytes * 0.9
+        for path, size, _ in sorted(self.entries(), key=lambda entry: entry[2]):
+            if self.used_bytes <= target:
+                break
+            try:
+                os.remove(path)
+                self.used_bytes -= size
+            except OSError:
+                pass
+
+
+_cache = None
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        _cache = DiskCache()
+    return _cache
@@ -0,0 +1,111 @@
+import os
+import zipfile
+import tarfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from PyQt6.QtCore import QThread, pyqtSignal
+from ExtractionWorkers import extract_zip_batch, extract_tar_batch
+import ProcessPool
+
+BATCH_ENTRIES = 64  # Members handed to a worker at once
+BATCH_BYTES = 16 * 1024 * 1024
+
+def batches(members):
+    batch = []
+    batch_bytes = 0
+    for member in members:
+        batch.append(member)
+        batch_bytes += member[1]
+        if len(batch) >= BATCH_ENTRIES or batch_bytes >= BATCH_BYTES:
+            yield batch
+            batch = []
+            batch_bytes = 0
+    if batch:
+        yield batch
+
+
+class ExtractionThread(QThread):
+    progress = pyqtSignal('qint64', 'qint64', int, int)  # bytes done, bytes total, entries done, entries total
+    failed = pyqtSignal(str)
+
+    def __init__(self, groups, parent=None):
+        # groups are (backend, members, dest_dir) per archive, members being (filename, file_size, offset)
+        # rows; archives nested in the opened one get a group of their own
+        super().__init__(parent)
+        self.groups = [(backend, sorted(members, key=lambda member: member[2]), dest_dir)  # Archive order keeps the reads sequential
+                       for backend, members, dest_dir in groups]
+        self.cancelled = threading.Event()
+        self.total_bytes = sum(member[1] for _, members, _ in self.groups for member in members)
+        self.total_entries = sum(len(members) for _, members, _ in self.groups)
+        self.done_bytes = 0
+        self.done_entries = 0
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def run(self):
+        try:
+            for self.backend, self.members, self.dest_dir in self.groups:
+                if self.cancelled.is_set():
+                    return
+                self.runGroup()
+        except Exception as e:
+            self.failed.emit(str(e))
+
+    def runGroup(self):
+        # The worker pools reopen the archive by path, which nested archives don't have
+        if self.backend.kind == 'zip' and self.backend.opener is None:
+            self.runZip()
+        elif self.backend.kind == 'tar' and self.backend.opener is None and self.isPlainTar():
+            self.runPool(ThreadPoolExecutor, extract_tar_batch,
+                         lambda batch: [member[2] for member in batch])
+        else:
+            # Solid 7z/RAR blocks and compressed tar streams can only be decoded front to back,
+            # so the whole selection goes to the backend in one pass and each block is decoded once
+            self.backend.extract([member[0] for member in self.members], self.dest_dir)
+            self.report(self.members)
+
+    def isPlainTar(self):
+        try:
+            with tarfile.open(self.backend.file_name, 'r:'):
+                return True
+        except tarfile.TarError:
+            return False
+
+    def runZip(self):
+        # Deflate/LZMA members are CPU-bound and go to processes; stored members are plain copies for threads
+        with zipfile.ZipFile(self.backend.file_name, 'r') as zip_ref:
+            stored = {info.filename for info in zip_ref.infolist() if info.compress_type == zipfile.ZIP_STORED}
+        plain = [member for member in self.members if member[0] in stored]
+        compressed = [member for member in self.members if member[0] not in stored]
+        with ThreadPoolExecutor(max_workers=min(8, (os.cpu_count() or 1) * 2)) as thread_pool:
+            # Handing work to processes only pays off once there is more than a batch of it
+            submit_compressed = ProcessPool.submit if len(compressed) > BATCH_ENTRIES else thread_pool.submit
+            futures = {}
+            for submit, members in ((thread_pool.submit, plain), (submit_compressed, compressed)):
+                for batch in batches(members):
+                    future = submit(extract_zip_batch, self.backend.file_name,
+                                    [member[0] for member in batch], self.dest_dir)
+                    futures[future] = batch
+            self.collect(futures)
+
+    def runPool(self, executor_class, worker, arguments):
+        with executor_class(max_workers=min(8, (os.cpu_count() or 1) * 2)) as pool:
+            futures = {pool.submit(worker, self.backend.file_name, arguments(batch), self.dest_dir): batch
+                       for batch in batches(self.members)}
+            self.collect(futures)
+
+    def collect(self, futures):
+        for future in as_completed(futures):
+            if self.cancelled.is_set():
+                # Batches that haven't started are dropped; running ones are small and finish on their own
+                for pending in futures:
+                    pending.cancel()
+                return
+            future.result()
+            self.report(futures[future])
+
+    def report(self, batch):
+        self.done_entries += len(batch)
+        self.done_bytes += sum(member[1] for member in batch)
+        self.progress.emit(self.done_bytes, self.total_bytes, self.done_entries, self.total_entries)
@@ -0,0 +1,33 @@
+import os
+import zipfile
+import tarfile
+import threading
+
+# Run in the shared process pool and in thread pools; kept free of Qt so spawned workers stay light
+
+_worker = threading.local()
+
+def open_zip(file_name):
+    # Parsing the central directory of a zip with many members can take longer than extracting a batch,
+    # so each worker thread or process keeps its latest archive open across batches
+    st = os.stat(file_name)
+    key = (os.path.abspath(file_name), st.st_mtime_ns, st.st_size)
+    if getattr(_worker, 'zip_key', None) != key:
+        if getattr(_worker, 'zip_ref', None) is not None:
+            _worker.zip_ref.close()
+        _worker.zip_ref = zipfile.ZipFile(file_name, 'r')
+        _worker.zip_key = key
+    return _worker.zip_ref
+
+def extract_zip_batch(file_name, filenames, dest_dir):
+    zip_ref = open_zip(file_name)
+    for filename in filenames:
+        zip_ref.extract(filename, dest_dir)
+
+def extract_tar_batch(file_name, offsets, dest_dir):
+    # Uncompressed tars allow seeking straight to each member header instead of scanning the archive
+    with tarfile.open(file_name, 'r:') as tar_ref:
+        for offset in offsets:
+            tar_ref.fileobj.seek(offset)
+            # Refuses absolute paths, '..' and links leading outside dest_dir, as the tar tool does
+            tar_ref.extract(tarfile.TarInfo.fromtarfile(tar_ref), dest_dir, filter='data')
@@ -0,0 +1,191 @@
+import re
+import threading
+from PyQt6.QtWidgets import QToolBar, QLineEdit, QCheckBox, QPushButton, QLabel
+from PyQt6.QtGui import QTextCursor
+from PyQt6.QtCore import Qt, QTimer
+from TextSearch import SearchThread, compile_pattern, compile_hex_pattern, BINARY_REGEX_OVERLAP
+from TextViewer import LineIndex
+
+SEARCH_DELAY_MS = 250  # Typing pauses this long before a new search starts
+
+class TextEditSearchTarget:
+    """Searches the plain text of a QTextEdit and selects matches by mapping byte offsets back to blocks."""
+
+    def __init__(self, text_edit):
+        self.text_edit = text_edit
+        self.buffer = text_edit.toPlainText().encode('utf-8')
+        self.line_index = LineIndex(self.buffer)
+        self.line_index.build(threading.Event())  # Small enough to index on the spot
+
+    def trigramIndex(self):
+        return None
+
+    def showMatch(self, offset, length):
+        line = self.line_index.line_at(offset)
+        line_start = self.line_index.line_offset(line)
+        # QTextDocument positions count UTF-16 code units
+        column = len(self.buffer[line_start:offset].decode('utf-8', 'replace').encode('utf-16-le')) // 2
+        width = len(self.buffer[offset:offset + length].decode('utf-8', 'replace').encode('utf-16-le')) // 2
+        block = self.text_edit.document().findBlockByNumber(line)
+        cursor = QTextCursor(block)
+        cursor.setPosition(block.position() + column)
+        cursor.setPosition(block.position() + column + width, QTextCursor.MoveMode.KeepAnchor)
+        self.text_edit.setTextCursor(cursor)
+        self.text_edit.ensureCursorVisible()
+        return True
+
+    def clearMatch(self):
+        cursor = self.text_edit.textCursor()
+        cursor.clearSelection()
+        self.text_edit.setTextCursor(cursor)
+
+
+class FindBar(QToolBar):
+    def __init__(self, parent=None):
+        super().__init__("Find", parent)
+        self.setMovable(False)
+        self.target = None
+        self.search_thread = None
+        self.current = -1  # Index of the shown match
+        self.percent = 0  # How far the running search got
+
+        self.query_edit = QLineEdit(self)
+        self.query_edit.setPlaceholderText("Find")
+        self.query_edit.textChanged.connect(self.scheduleSearch)
+        self.query_edit.returnPressed.connect(self.findNext)
+        self.addWidget(self.query_edit)
+
+        self.regex_box = QCheckBox("Regex", self)
+        self.regex_box.toggled.connect(self.scheduleSearch)
+        self.addWidget(self.regex_box)
+        self.case_box = QCheckBox("Match case", self)
+        self.case_box.toggled.connect(self.scheduleSearch)
+        self.addWidget(self.case_box)
+        # Byte patterns, only offered for binary targets
+        self.hex_box = QCheckBox("Hex", self)
+        self.hex_box.toggled.connect(self.scheduleSearch)
+        self.hex_action = self.addWidget(self.hex_box)
+        self.hex_action.setVisible(False)
+
+        previous_button = QPushButton("Previous", self)
+        previous_button.clicked.connect(self.findPrevious)
+        self.addWidget(previous_button)
+        next_button = QPushButton("Next", self)
+        next_button.clicked.connect(self.findNext)
+        self.addWidget(next_button)
+
+        self.status_label = QLabel(self)
+        self.status_label.setMinimumWidth(160)
+        self.addWidget(self.status_label)
+
+        close_button = QPushButton("Close", self)
+        close_button.clicked.connect(self.close)
+        self.addWidget(close_button)
+
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(self.startSearch)
+
+    def setTarget(self, target):
+        self.cancelSearch()
+        self.target = target
+        self.hex_action.setVisible(getattr(target, 'binary', False))
+        self.scheduleSearch()
+
+    def activate(self):
+        self.show()
+        self.query_edit.setFocus()
+        self.query_edit.selectAll()
+
+    def scheduleSearch(self, *args):
+        self.search_timer.start()
+
+    def cancelSearch(self):
+        self.search_timer.stop()
+        if self.search_thread is not None:
+            self.search_thread.cancel()
+            self.search_thread.wait()
+            self.search_thread = None
+        self.current = -1
+        self.percent = 0
+
+    def startSearch(self):
+        self.cancelSearch()
+        text = self.query_edit.text()
+        if self.target is None or not text:
+            self.status_label.clear()
+            return
+        regex = self.regex_box.isChecked()
+        overlap = None
+        if self.hex_action.isVisible() and self.hex_box.isChecked():
+            try:
+                pattern, length = compile_hex_pattern(text)
+            except ValueError as e:
+                self.status_label.setText(f"Invalid hex: {e}")
+                return
+            literal = None
+            overlap = length - 1
+        else:
+            try:
+                pattern = compile_pattern(text, regex, self.case_box.isChecked())
+            except re.error as e:
+                self.status_label.setText(f"Invalid pattern: {e.msg}")
+                return
+            literal = None if regex else text.encode('utf-8')
+            if getattr(self.target, 'binary', False):
+                # Binary data seldom has a newline to cut chunks at, so chunks overlap by the longest match instead
+                overlap = len(literal) - 1 if literal is not None else BINARY_REGEX_OVERLAP
+        self.search_thread = SearchThread(self.target.buffer, pattern, literal, self.target.trigramIndex(), overlap,
+                                          self)
+        self.search_thread.progress.connect(self.searchProgress)
+        self.search_thread.start()
+
+    def searchProgress(self, count, percent):
+        if self.sender() is not self.search_thread:
+            return  # Late signal from a cancelled search
+        self.percent = percent
+        if self.current < 0 and count:
+            self.showCurrent(0)
+        else:
+            self.updateStatus()
+
+    def updateStatus(self):
+        thread = self.search_thread
+        percent = self.percent
+        count = len(thread.starts) if thread is not None else 0
+        total = f"{count}+" if thread is not None and thread.truncated else str(count)
+        text = f"{self.current + 1} of {total}" if count else "No matches"
+        if percent < 100:
+            text += f" (searching {percent}%)"
+        self.status_label.setText(text)
+
+    def showCurrent(self, current):
+        thread = self.search_thread
+        self.current = current
+        if not self.target.showMatch(thread.starts[current], thread.lengths[current]):
+            self.status_label.setText("Still indexing lines, try again shortly")
+            return
+        self.updateStatus()
+
+    def findNext(self):
+        if self.search_thread is not None and len(self.search_thread.starts):
+            self.showCurrent((self.current + 1) % len(self.search_thread.starts))
+
+    def findPrevious(self):
+        if self.search_thread is not None and len(self.search_thread.starts):
+            self.showCurrent((self.current - 1) % len(self.search_thread.starts))
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key.Key_Escape:
+            self.close()
+        else:
+            super().keyPressEvent(event)
+
+    def closeEvent(self, event):
+        # Also cancels a long scan that is still running
+        self.cancelSearch()
+        if self.target is not None:
+            self.target.clearMatch()
+        self.status_label.clear()
+        super().closeEvent(event)
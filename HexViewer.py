@@ -0,0 +1,132 @@
+from PyQt6.QtWidgets import QAbstractScrollArea
+from PyQt6.QtGui import QPainter, QFont, QFontMetrics, QColor
+
+BYTES_PER_ROW = 16
+MAX_SCROLL_ROWS = 1 << 30  # Scroll bars hold an int; beyond this each step moves several rows
+PRINTABLE = bytes(byte if 32 <= byte < 127 else ord('.') for byte in range(256))
+
+def parse_offset(text):
+    # "0x1F40", "1f40h" and "$1F40" are hex, plain digits are decimal; raises ValueError
+    text = text.strip().replace('_', '').replace(' ', '')
+    lowered = text.lower()
+    if lowered.startswith('0x'):
+        return int(text[2:], 16)
+    if lowered.endswith('h'):
+        return int(text[:-1], 16)
+    if text.startswith('$'):
+        return int(text[1:], 16)
+    return int(text, 10)
+
+
+class HexViewer(QAbstractScrollArea):
+    """Offset, hex and ASCII columns over a memory-mapped buffer; only the visible rows are ever read."""
+
+    binary = True  # Lets the find bar offer byte patterns
+
+    def __init__(self, buffer, parent=None):
+        super().__init__(parent)
+        self.buffer = buffer
+        self.size = len(buffer)
+        self.row_total = (self.size + BYTES_PER_ROW - 1) // BYTES_PER_ROW
+        self.row_scale = max(1, -(-self.row_total // MAX_SCROLL_ROWS))
+        self.offset_digits = max(8, len(f"{max(self.size - 1, 0):X}"))
+        self.highlight = None  # (byte offset, length) of the current match or jump target
+        self.setFont(QFont("Consolas", 12))
+        self.viewport().setAutoFillBackground(True)
+
+    # Search target interface used by FindBar
+
+    def trigramIndex(self):
+        return None  # Memory stays constant however large the file; searches stream through it instead
+
+    def showMatch(self, offset, length):
+        self.highlight = (offset, length)
+        row = offset // BYTES_PER_ROW
+        first = self.firstRow()
+        if not first <= row < first + self.visibleRows():
+            self.scrollToRow(row - self.visibleRows() // 3)
+        self.viewport().update()
+        return True
+
+    def clearMatch(self):
+        self.highlight = None
+        self.viewport().update()
+
+    def goToOffset(self, offset):
+        if not 0 <= offset < self.size:
+            return False
+        return self.showMatch(offset, 1)
+
+    def setFont(self, font):
+        super().setFont(font)
+        self.viewport().setFont(font)
+        self.updateScrollBars()
+        self.viewport().update()
+
+    def firstRow(self):
+        return min(self.verticalScrollBar().value() * self.row_scale, max(0, self.row_total - 1))
+
+    def scrollToRow(self, row):
+        self.verticalScrollBar().setValue(max(0, row) // self.row_scale)
+
+    def visibleRows(self):
+        return max(1, self.viewport().height() // QFontMetrics(self.font()).lineSpacing())
+
+    def rowWidth(self):
+        # Offset, hex bytes with a gap after the eighth, then the ASCII column
+        characters = self.offset_digits + 2 + BYTES_PER_ROW * 3 + 2 + BYTES_PER_ROW
+        return QFontMetrics(self.font()).horizontalAdvance('0') * characters + 8
+
+    def updateScrollBars(self):
+        visible = self.visibleRows()
+        vertical = self.verticalScrollBar()
+        vertical.setRange(0, max(0, self.row_total - visible) // self.row_scale)
+        vertical.setPageStep(max(1, visible // self.row_scale))
+        vertical.setSingleStep(1)
+        horizontal = self.horizontalScrollBar()
+        horizontal.setRange(0, max(0, self.rowWidth() - self.viewport().width()))
+        horizontal.setPageStep(self.viewport().width())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.updateScrollBars()
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.fillRect(event.rect(), self.palette().base())
+        metrics = QFontMetrics(self.font())
+        line_height = metrics.lineSpacing()
+        char_width = metrics.horizontalAdvance('0')
+        x = 4 - self.horizontalScrollBar().value()
+        hex_x = x + char_width * (self.offset_digits + 2)
+        ascii_x = hex_x + char_width * (BYTES_PER_ROW * 3 + 2)
+        first = self.firstRow()
+        start = first * BYTES_PER_ROW
+        data = bytes(self.buffer[start:start + (self.visibleRows() + 1) * BYTES_PER_ROW])
+        highlight_start, highlight_end = (self.highlight[0], sum(self.highlight)) if self.highlight else (0, 0)
+        text_color = self.palette().text().color()
+        offset_color = QColor("gray")
+        y = 0
+        for row_start in range(0, len(data), BYTES_PER_ROW):
+            row = data[row_start:row_start + BYTES_PER_ROW]
+            offset = start + row_start
+            # Highlight the part of the match on this row in both columns
+            left = max(highlight_start, offset) - offset
+            right = min(highlight_end, offset + len(row)) - offset
+            if left < right:
+                for column_x, width, gap in ((hex_x, 3, True), (ascii_x, 1, False)):
+                    from_x = column_x + char_width * (left * width + (gap and left >= 8))
+                    to_x = column_x + char_width * (right * width + (gap and right > 8) - (width > 1))
+                    painter.fillRect(from_x, y, to_x - from_x, line_height, QColor("#ffd54f"))
+            painter.setPen(offset_color)
+            painter.drawText(x, y + metrics.ascent(), f"{offset:0{self.offset_digits}X}")
+            painter.setPen(text_color)
+            hex_text = row[:8].hex(' ').upper()
+            if len(row) > 8:
+                hex_text += '  ' + row[8:].hex(' ').upper()
+            painter.drawText(hex_x, y + metrics.ascent(), hex_text)
+            painter.drawText(ascii_x, y + metrics.ascent(), row.translate(PRINTABLE).decode('ascii'))
+            y += line_height
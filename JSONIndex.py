@@ -0,0 +1,114 @@
+import re
+import json
+import sys
+
+WHITESPACE = re.compile(rb'[ \t\n\r]*')
+STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+SCALAR = re.compile(rb'-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?|true|false|null')
+STRUCTURE = re.compile(rb'[\[\]{}]|"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)  # Brackets, with strings skipped whole
+
+OBJECT, ARRAY, STRING_VALUE, NUMBER, BOOLEAN, NULL = range(6)
+KINDS = {ord('{'): OBJECT, ord('['): ARRAY, ord('"'): STRING_VALUE, ord('t'): BOOLEAN, ord('f'): BOOLEAN,
+         ord('n'): NULL}
+
+
+class JSONIndexError(ValueError):
+    pass
+
+
+class JSONIndex:
+    """Random access to the values of a JSON document by byte offset, without parsing what isn't looked at.
+
+    Containers are only walked when their children are asked for, and nested containers are skipped by
+    bracket matching rather than parsed, so memory use depends on what is shown, not on the document size.
+    """
+
+    def __init__(self, buffer):
+        self.buffer = buffer  # bytes, memoryview or mmap
+        self.size = len(buffer)
+        start = 3 if bytes(buffer[:3]) == b'\xef\xbb\xbf' else 0
+        self.root = self.skip_whitespace(start)
+        if self.root >= self.size:
+            raise JSONIndexError("Empty document")
+
+    def skip_whitespace(self, position):
+        return WHITESPACE.match(self.buffer, position).end()
+
+    def byte(self, position):
+        if position >= self.size:
+            raise JSONIndexError(f"Unexpected end of document at byte {position}")
+        return self.buffer[position]
+
+    def kind(self, offset):
+        byte = self.byte(offset)
+        kind = KINDS.get(byte)
+        if kind is None:
+            if byte == ord('-') or ord('0') <= byte <= ord('9'):
+                return NUMBER
+            raise JSONIndexError(f"Unexpected character at byte {offset}")
+        return kind
+
+    def is_container(self, offset):
+        return self.kind(offset) in (OBJECT, ARRAY)
+
+    def is_empty(self, offset):
+        # For containers: nothing but whitespace before the closing bracket
+        return self.byte(self.skip_whitespace(offset + 1)) in (ord('}'), ord(']'))
+
+    def scalar(self, offset):
+        # Parsed value of a string, number, boolean or null
+        match = (STRING if self.kind(offset) == STRING_VALUE else SCALAR).match(self.buffer, offset)
+        if match is None:
+            raise JSONIndexError(f"Invalid value at byte {offset}")
+        return json.loads(match.group())
+
+    def end(self, offset):
+        # Offset just past the value starting at offset
+        kind = self.kind(offset)
+        if kind not in (OBJECT, ARRAY):
+            match = (STRING if kind == STRING_VALUE else SCALAR).match(self.buffer, offset)
+            if match is None:
+                raise JSONIndexError(f"Invalid value at byte {offset}")
+            return match.end()
+        depth = 0
+        buffer = self.buffer
+        for match in STRUCTURE.finditer(buffer, offset):
+            byte = buffer[match.start()]
+            if byte in (0x7B, 0x5B):  # { [
+                depth += 1
+            elif byte in (0x7D, 0x5D):  # } ]
+                depth -= 1
+                if depth == 0:
+                    return match.end()
+        raise JSONIndexError(f"Unterminated container at byte {offset}")
+
+    def children(self, offset, position=None):
+        # Yields (key, value offset, position after the value) for the members of the container at offset;
+        # keys are None for arrays. position resumes an earlier walk where it left off.
+        is_object = self.kind(offset) == OBJECT
+        closing = ord('}') if is_object else ord(']')
+        position = self.skip_whitespace(offset + 1 if position is None else position)
+        if self.byte(position) == closing:
+            return
+        while True:
+            key = None
+            if is_object:
+                match = STRING.match(self.buffer, position)
+                if match is None:
+                    raise JSONIndexError(f"Expected a key at byte {position}")
+                key = sys.intern(json.loads(match.group()))
+                position = self.skip_whitespace(match.end())
+                if self.byte(position) != ord(':'):
+                    raise JSONIndexError(f"Expected ':' at byte {position}")
+                position = self.skip_whitespace(position + 1)
+            value = position
+            position = self.skip_whitespace(self.end(value))
+            byte = self.byte(position)
+            if byte == ord(','):
+                position = self.skip_whitespace(position + 1)
+                yield key, value, position
+            elif byte == closing:
+                yield key, value, None
+                return
+            else:
+                raise JSONIndexError(f"Expected ',' at byte {position}")
@@ -0,0 +1,231 @@
+import re
+import json
+import threading
+from collections import deque
+from PyQt6.QtCore import QThread, pyqtSignal
+from JSONIndex import JSONIndexError, OBJECT, ARRAY
+
+MAX_MATCHES = 1000  # Matches revealed in the tree; the query stops looking after that
+
+NAME = r'[A-Za-z_$\-][\w$\-]*'
+QUOTED = r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\""
+NAME_STEP = re.compile(NAME)
+BRACKET_STEP = re.compile(rf"\[\s*(?:(?P<index>-?\d+)|(?P<quoted>{QUOTED})|(?P<wildcard>\*?)|\?\((?P<filter>.*?)\))\s*\]")
+FILTER = re.compile(rf"""\s*@(?P<path>(?:\.{NAME}|\[\s*(?:-?\d+|{QUOTED})\s*\])*)\s*
+    (?:(?P<operator>==|!=|<=|>=|<|>|=~)\s*(?P<literal>.+?))?\s*$""", re.VERBOSE)
+RELATIVE_STEP = re.compile(rf"\.(?P<name>{NAME})|\[\s*(?:(?P<index>-?\d+)|(?P<quoted>{QUOTED}))\s*\]")
+OPERATORS = {
+    '==': lambda a, b: a == b, '!=': lambda a, b: a != b,
+    '<': lambda a, b: a < b, '<=': lambda a, b: a <= b, '>': lambda a, b: a > b, '>=': lambda a, b: a >= b,
+    '=~': lambda a, b: isinstance(a, str) and b.search(a) is not None,
+}
+MISSING = object()
+CONTAINER = object()
+
+
+class JSONQueryError(ValueError):
+    pass
+
+
+def unquote(quoted):
+    if quoted.startswith("'"):
+        quoted = '"' + quoted[1:-1].replace('\\\'', '\'').replace('"', '\\"') + '"'
+    return json.loads(quoted)
+
+def compile_filter(text):
+    # @.path, @.path == literal, @ > 3, @.name =~ 'regex'; literals are JSON or single-quoted strings
+    match = FILTER.match(text)
+    if match is None:
+        raise JSONQueryError(f"Unsupported filter: {text}")
+    path = relative_steps(match.group('path'))
+    operator = match.group('operator')
+    literal = None
+    if operator is not None:
+        literal = match.group('literal')
+        try:
+            literal = unquote(literal) if literal[0] in "'\"" else json.loads(literal)
+        except ValueError:
+            raise JSONQueryError(f"Invalid literal: {literal}")
+        if operator == '=~':
+            try:
+                literal = re.compile(str(literal))
+            except re.error as e:
+                raise JSONQueryError(f"Invalid regular expression: {e}")
+    return path, operator, literal
+
+def relative_steps(text):
+    steps = []
+    for match in RELATIVE_STEP.finditer(text):
+        if match.group('name') is not None:
+            steps.append(match.group('name'))
+        elif match.group('index') is not None:
+            steps.append(int(match.group('index')))
+        else:
+            steps.append(unquote(match.group('quoted')))
+    return steps
+
+def compile_query(text):
+    # JSONPath ($.store.book[*].author, $..price, $.items[?(@.id > 3)]) or the jq path subset
+    # (.store.book[].author, .items[0]); returns (kind, argument, recursive) steps
+    text = text.strip()
+    if text.startswith('$'):
+        text = text[1:]
+    elif text and text[0] not in '.[':
+        text = '.' + text  # Bare key paths like user.id
+    steps = []
+    position = 0
+    while position < len(text):
+        recursive = text.startswith('..', position)
+        if recursive or text[position] == '.':
+            position += 2 if recursive else 1
+            if position == len(text) and not steps and not recursive:
+                break  # jq's identity "."
+        name = NAME_STEP.match(text, position) if text[position - 1:position] == '.' else None
+        bracket = BRACKET_STEP.match(text, position)
+        if name is not None:
+            steps.append(('name', name.group(), recursive))
+            position = name.end()
+        elif text[position - 1:position] == '.' and text.startswith('*', position):
+            steps.append(('wildcard', None, recursive))
+            position += 1
+        elif bracket is not None:
+            if bracket.group('index') is not None:
+                steps.append(('index', int(bracket.group('index')), recursive))
+            elif bracket.group('quoted') is not None:
+                steps.append(('name', unquote(bracket.group('quoted')), recursive))
+            elif bracket.group('filter') is not None:
+                steps.append(('filter', compile_filter(bracket.group('filter')), recursive))
+            else:
+                steps.append(('wildcard', None, recursive))
+            position = bracket.end()
+        else:
+            raise JSONQueryError(f"Unexpected '{text[position:position + 10]}' at position {position + 1}")
+    return steps
+
+
+class QueryEvaluator:
+    """Evaluates compiled steps against a JSONIndex, reading only the containers the query walks through.
+
+    Items are (offset, path) pairs, path being the row of each container member from the model's root down,
+    which is what the view needs to materialize just the matches.
+    """
+
+    def __init__(self, json_index, cancelled):
+        self.json_index = json_index
+        self.cancelled = cancelled
+
+    def members(self, offset, path):
+        if not self.json_index.is_container(offset):
+            return
+        for row, (key, child, _) in enumerate(self.json_index.children(offset)):
+            if self.cancelled.is_set():
+                return
+            yield key, child, path + (row,)
+
+    def descendants(self, items):
+        # Each item followed by everything under it, in document order, without recursion
+        for offset, path in items:
+            yield offset, path
+            stack = [self.members(offset, path)]
+            while stack:
+                member = next(stack[-1], None)
+                if member is None:
+                    stack.pop()
+                    continue
+                _, child, child_path = member
+                yield child, child_path
+                stack.append(self.members(child, child_path))
+
+    def step(self, step, items):
+        kind, argument, recursive = step
+        if recursive:
+            items = self.descendants(items)
+        for offset, path in items:
+            if kind == 'name':
+                if self.json_index.kind(offset) == OBJECT:
+                    for key, child, child_path in self.members(offset, path):
+                        if key == argument:
+                            yield child, child_path
+            elif kind == 'index':
+                if self.json_index.kind(offset) == ARRAY:
+                    member = self.member_at(offset, path, argument)
+                    if member is not None:
+                        yield member
+            else:
+                for _, child, child_path in self.members(offset, path):
+                    if kind == 'wildcard' or self.matches(child, argument):
+                        yield child, child_path
+
+    def member_at(self, offset, path, index):
+        # Negative indexes count from the end, keeping only that many members in memory
+        last = deque(maxlen=-index) if index < 0 else None
+        for _, child, child_path in self.members(offset, path):
+            if last is not None:
+                last.append((child, child_path))
+            elif child_path[-1] == index:
+                return child, child_path
+        return last[0] if last is not None and len(last) == -index else None
+
+    def resolve(self, offset, steps):
+        # Value at a relative path; MISSING if it doesn't exist, CONTAINER for objects and arrays
+        for step in steps:
+            kind = self.json_index.kind(offset)
+            if isinstance(step, int):
+                member = self.member_at(offset, (), step) if kind == ARRAY else None
+                if member is None:
+                    return MISSING
+                offset = member[0]
+            else:
+                offset = next((child for key, child, _ in self.members(offset, ()) if key == step), None) \
+                    if kind == OBJECT else None
+                if offset is None:
+                    return MISSING
+        return CONTAINER if self.json_index.is_container(offset) else self.json_index.scalar(offset)
+
+    def matches(self, offset, condition):
+        steps, operator, literal = condition
+        value = self.resolve(offset, steps)
+        if operator is None:
+            return value is not MISSING
+        if value is MISSING or value is CONTAINER:
+            return False
+        if isinstance(value, bool) != isinstance(literal, bool) and operator in ('==', '!='):
+            return operator == '!='
+        try:
+            return OPERATORS[operator](value, literal)
+        except TypeError:
+            return False
+
+    def evaluate(self, steps, items):
+        for step in steps:
+            items = self.step(step, items)
+        return items
+
+
+class QueryThread(QThread):
+    matched = pyqtSignal(object, bool)  # Paths of the matches, whether the search stopped at MAX_MATCHES
+    failed = pyqtSignal(str)
+
+    def __init__(self, json_index, steps, items, parent=None):
+        super().__init__(parent)
+        self.json_index = json_index
+        self.steps = steps
+        self.items = items  # (offset, path) of the model's top-level rows
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def run(self):
+        evaluator = QueryEvaluator(self.json_index, self.cancelled)
+        paths = []
+        try:
+            for _, path in evaluator.evaluate(self.steps, iter(self.items)):
+                paths.append(path)
+                if len(paths) >= MAX_MATCHES:
+                    break
+        except JSONIndexError as e:
+            self.failed.emit(str(e))
+            return
+        if not self.cancelled.is_set():
+            self.matched.emit(paths, len(paths) >= MAX_MATCHES)
@@ -1,59 +1,325 @@
-from PyQt6.QtWidgets import QTreeWidget, QTreeWidgetItem
+from array import array
+from collections import deque
+from PyQt6.QtWidgets import QTreeView, QStyle, QAbstractItemView
 from PyQt6.QtGui import QColor, QFont
-from PyQt6.QtCore import Qt
-import json
+from PyQt6.QtCore import Qt, QAbstractItemModel, QModelIndex, QItemSelection, QItemSelectionModel, pyqtSignal
+from JSONIndex import JSONIndex, JSONIndexError, OBJECT, ARRAY, STRING_VALUE, NUMBER, BOOLEAN, NULL
+from JSONQuery import QueryThread, JSONQueryError, compile_query
+
+FETCH_BATCH_SIZE = 2000  # Members read from the document per fetchMore call
+MAX_DISPLAY_CHARS = 1000  # Longer strings are cut short in the Value column
+MAX_EXPANDED = 5000  # Containers opened by one expand-to-depth
+
+KEY_COLORS = {OBJECT: "blue", ARRAY: "magenta"}
+VALUE_COLORS = {BOOLEAN: "green", NUMBER: "red", STRING_VALUE: "blue", NULL: "gray"}
+ICONS = {
+    OBJECT: QStyle.StandardPixmap.SP_DirIcon,
+    ARRAY: QStyle.StandardPixmap.SP_FileIcon,
+    BOOLEAN: QStyle.StandardPixmap.SP_MessageBoxQuestion,
+    NUMBER: QStyle.StandardPixmap.SP_DriveHDIcon,
+    STRING_VALUE: QStyle.StandardPixmap.SP_FileDialogContentsView,
+    NULL: QStyle.StandardPixmap.SP_MessageBoxCritical,
+}
+
+
+class ContainerNode:
+    # Only objects and arrays the view has asked about get a node; their members are byte offsets into the document
+    __slots__ = ('offset', 'parent', 'row', 'keys', 'offsets', 'resume', 'error', 'subnodes', 'values')
+
+    def __init__(self, offset, parent, row, is_object):
+        self.offset = offset
+        self.parent = parent
+        self.row = row
+        self.keys = [] if is_object else None  # Arrays use the row as key
+        self.offsets = array('q')  # Start of each member read so far
+        self.resume = offset + 1 if offset is not None else None  # Where reading continues; None once complete
+        self.error = None  # Shown as an extra row when the document turns out to be malformed
+        self.subnodes = {}  # row -> ContainerNode
+        self.values = {}  # row -> (kind, text), for the rows that have been displayed
+
+
+class JSONModel(QAbstractItemModel):
+    def __init__(self, json_index, icons, parent=None):
+        super().__init__(parent)
+        self.json_index = json_index
+        self.icons = icons
+        self.font = QFont("Consolas", 10)
+        self.key_colors = {kind: QColor(color) for kind, color in KEY_COLORS.items()}
+        self.value_colors = {kind: QColor(color) for kind, color in VALUE_COLORS.items()}
+        self.error_color = QColor("red")
+        # The invisible root holds the document's top-level value under an empty key
+        self.root = ContainerNode(None, None, 0, True)
+        if json_index is None:
+            self.root.error = "Invalid JSON"
+        else:
+            self.root.keys.append("")
+            self.root.offsets.append(json_index.root)
+
+    def containerNode(self, index):
+        # The internal pointer of an index is the ContainerNode of its parent
+        if not index.isValid():
+            return self.root
+        parent = index.internalPointer()
+        node = parent.subnodes.get(index.row())
+        if node is None:
+            offset = parent.offsets[index.row()]
+            node = ContainerNode(offset, parent, index.row(), self.json_index.kind(offset) == OBJECT)
+            parent.subnodes[index.row()] = node
+        return node
+
+    def describe(self, node, row):
+        # (kind, value text) of a member; kind is None for error rows and unreadable values
+        if row >= len(node.offsets):
+            return None, node.error
+        value = node.values.get(row)
+        if value is None:
+            try:
+                kind = self.json_index.kind(node.offsets[row])
+                if kind in (OBJECT, ARRAY):
+                    text = ""
+                elif kind == NULL:
+                    text = "null"
+                else:
+                    text = str(self.json_index.scalar(node.offsets[row]))
+                    if len(text) > MAX_DISPLAY_CHARS:
+                        text = text[:MAX_DISPLAY_CHARS] + "…"
+                value = kind, text
+            except (JSONIndexError, ValueError):
+                value = None, "Invalid JSON"
+            node.values[row] = value
+        return value
+
+    def key(self, node, row):
+        return node.keys[row] if node.keys is not None else str(row)
+
+    def isContainer(self, index):
+        if not index.isValid():
+            return True
+        return self.describe(index.internalPointer(), index.row())[0] in (OBJECT, ARRAY)
+
+    def index(self, row, column, parent=QModelIndex()):
+        if not self.isContainer(parent):
+            return QModelIndex()
+        node = self.containerNode(parent)
+        if not 0 <= row < self.rows(node):
+            return QModelIndex()
+        return self.createIndex(row, column, node)
+
+    def parent(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        node = index.internalPointer()
+        if node is self.root:
+            return QModelIndex()
+        return self.createIndex(node.row, 0, node.parent)
+
+    def rows(self, node):
+        return len(node.offsets) + (node.error is not None)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0 or not self.isContainer(parent):
+            return 0
+        return self.rows(self.containerNode(parent))
+
+    def columnCount(self, parent=QModelIndex()):
+        return 2
+
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return True
+        if parent.column() > 0 or not self.isContainer(parent):
+            return False
+        try:
+            return not self.json_index.is_empty(parent.internalPointer().offsets[parent.row()])
+        except JSONIndexError:
+            return True  # Expanding shows the error
+
+    def canFetchMore(self, parent):
+        if not parent.isValid() or not self.isContainer(parent):
+            return False
+        return self.containerNode(parent).resume is not None
+
+    def fetchMore(self, parent):
+        node = self.containerNode(parent)
+        if node.resume is None:
+            return
+        keys, offsets = [], []
+        error = None
+        try:
+            for key, offset, resume in self.json_index.children(node.offset, node.resume):
+                keys.append(key)
+                offsets.append(offset)
+                node.resume = resume
+                if len(offsets) >= FETCH_BATCH_SIZE:
+                    break
+            else:
+                node.resume = None  # Also covers empty containers, which yield nothing
+        except JSONIndexError as e:
+            node.resume = None
+            error = str(e)
+        count = len(offsets) + (error is not None)
+        if count == 0:
+            return
+        first = len(node.offsets)
+        self.beginInsertRows(parent, first, first + count - 1)
+        if node.keys is not None:
+            node.keys.extend(keys)
+        node.offsets.extend(offsets)
+        node.error = error
+        self.endInsertRows()
+
+    def indexForPath(self, path):
+        # path holds a row per level from the top; each container on it is read only as far as that row
+        index = QModelIndex()
+        for row in path:
+            node = self.containerNode(index)
+            while len(node.offsets) <= row and node.resume is not None:
+                self.fetchMore(index)
+            if row >= len(node.offsets):
+                return QModelIndex()
+            index = self.index(row, 0, index)
+        return index
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return ["Key", "Value"][section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        row = index.row()
+        kind, text = self.describe(node, row)
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 1:
+                return text
+            if row >= len(node.offsets):
+                return "Error"
+            return self.key(node, row)
+        if role == Qt.ItemDataRole.FontRole:
+            return self.font
+        if role == Qt.ItemDataRole.ForegroundRole:
+            if kind is None:
+                return self.error_color if column == 1 else None
+            return (self.key_colors if column == 0 else self.value_colors).get(kind)
+        if role == Qt.ItemDataRole.DecorationRole and column == 0:
+            return self.icons.get(kind)
+        return None
+
+
+class JSONViewer(QTreeView):
+    """Tree view of a JSON document that only reads the parts that are expanded.
+
+    json_data may be text or any bytes-like buffer, such as a memory-mapped file; it is never parsed as a whole.
+    """
+
+    model_class = JSONModel
+    status = pyqtSignal(str)
 
-class JSONViewer(QTreeWidget):
     def __init__(self, json_data):
         super().__init__()
-        self.setHeaderLabels(["Key", "Value"])
+        if isinstance(json_data, str):
+            json_data = json_data.encode('utf-8')
         self.setAlternatingRowColors(True)
+        self.setUniformRowHeights(True)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.query_thread = None
+        self.matches = []  # Paths found by the last query
+        self.current_match = -1
+        try:
+            json_index = JSONIndex(json_data)
+        except JSONIndexError:
+            json_index = None
+        # Looked up once here rather than per item
+        icons = {kind: self.style().standardIcon(pixmap) for kind, pixmap in ICONS.items()}
+        self.json_model = self.model_class(json_index, icons, self)
+        self.setModel(self.json_model)
         self.setColumnWidth(0, 200)
-        self.json_data = json_data
-        self.populate_tree()
 
-    def populate_tree(self):
+    def expandTo(self, depth):
+        # Breadth first over the rows already read, opening at most MAX_EXPANDED containers, so a wide
+        # document can't turn this into reading everything like expandAll would
+        model = self.json_model
+        queue = deque((model.index(row, 0), 0) for row in range(min(model.rowCount(), MAX_EXPANDED)))
+        expanded = 0
+        while queue and expanded < MAX_EXPANDED:
+            index, level = queue.popleft()
+            if level >= depth or not model.hasChildren(index):
+                continue
+            if model.rowCount(index) == 0 and model.canFetchMore(index):
+                model.fetchMore(index)
+            self.expand(index)
+            expanded += 1
+            if len(queue) < MAX_EXPANDED:
+                queue.extend((model.index(row, 0, index), level + 1) for row in range(model.rowCount(index)))
+
+    def runQuery(self, text):
+        # Evaluated in the background against the document; only the matches and their ancestors get read
+        self.cancelQuery()
+        self.clearSelection()
+        self.matches = []
+        self.current_match = -1
+        json_index = self.json_model.json_index
+        if not text.strip() or json_index is None:
+            self.status.emit("")
+            return
         try:
-            data = json.loads(self.json_data)
-            self.add_json_item(self.invisibleRootItem(), "", data)
-        except json.JSONDecodeError:
-            error_item = QTreeWidgetItem(["Error", "Invalid JSON"])
-            error_item.setForeground(1, QColor("red"))
-            self.addTopLevelItem(error_item)
-
-    def add_json_item(self, parent, key, value):
-        item = QTreeWidgetItem(parent, [str(key)])
-        self.format_item(item, value)
-        
-        if isinstance(value, dict):
-            for k, v in value.items():
-                self.add_json_item(item, k, v)
-        elif isinstance(value, list):
-            for i, v in enumerate(value):
-                self.add_json_item(item, str(i), v)
-        else:
-            item.setText(1, str(value))
-
-    def format_item(self, item, value):
-        if isinstance(value, dict):
-            item.setForeground(0, QColor("blue"))
-            item.setIcon(0, self.style().standardIcon(self.style().StandardPixmap.SP_DirIcon))
-        elif isinstance(value, list):
-            item.setForeground(0, QColor("magenta"))
-            item.setIcon(0, self.style().standardIcon(self.style().StandardPixmap.SP_FileIcon))
-        elif isinstance(value, bool):
-            item.setForeground(1, QColor("green"))
-            item.setIcon(0, self.style().standardIcon(self.style().StandardPixmap.SP_MessageBoxQuestion))
-        elif isinstance(value, (int, float)):
-            item.setForeground(1, QColor("red"))
-            item.setIcon(0, self.style().standardIcon(self.style().StandardPixmap.SP_DriveHDIcon))
-        elif isinstance(value, str):
-            item.setForeground(1, QColor("blue"))
-            item.setIcon(0, self.style().standardIcon(self.style().StandardPixmap.SP_FileDialogContentsView))
-        elif value is None:
-            item.setForeground(1, QColor("gray"))
-            item.setIcon(0, self.style().standardIcon(self.style().StandardPixmap.SP_MessageBoxCritical))
-            item.setText(1, "null")
-
-        item.setFont(0, QFont("Consolas", 10))
-        item.setFont(1, QFont("Consolas", 10))
+            steps = compile_query(text)
+        except JSONQueryError as e:
+            self.status.emit(str(e))
+            return
+        offsets = array('q', self.json_model.root.offsets)
+        items = ((offset, (row,)) for row, offset in enumerate(offsets))
+        self.query_thread = QueryThread(json_index, steps, items, self)
+        self.query_thread.matched.connect(self.queryMatched)
+        self.query_thread.failed.connect(self.status.emit)
+        self.query_thread.start()
+        self.status.emit("Searching…")
+
+    def queryMatched(self, paths, truncated):
+        if self.sender() is not self.query_thread:
+            return
+        self.matches = paths
+        selection = QItemSelection()
+        for path in paths:
+            index = self.json_model.indexForPath(path)
+            if not index.isValid():
+                continue
+            parent = index.parent()
+            while parent.isValid():
+                self.expand(parent)
+                parent = parent.parent()
+            selection.select(index, index.siblingAtColumn(1))
+        self.selectionModel().select(selection, QItemSelectionModel.SelectionFlag.ClearAndSelect)
+        if not paths:
+            self.status.emit("No matches")
+            return
+        self.showMatch(0)
+        if truncated:
+            self.status.emit(f"Showing the first {len(paths):,} matches")
+
+    def showMatch(self, number):
+        if not self.matches:
+            return
+        self.current_match = number % len(self.matches)
+        index = self.json_model.indexForPath(self.matches[self.current_match])
+        self.scrollTo(index)
+        self.selectionModel().setCurrentIndex(index, QItemSelectionModel.SelectionFlag.NoUpdate)
+        self.status.emit(f"Match {self.current_match + 1} of {len(self.matches):,}")
+
+    def nextMatch(self):
+        self.showMatch(self.current_match + 1)
+
+    def previousMatch(self):
+        self.showMatch(self.current_match - 1)
+
+    def cancelQuery(self):
+        if self.query_thread is not None:
+            self.query_thread.cancel()
+            self.query_thread.wait()
+            self.query_thread = None
+
+    def stop(self):
+        self.cancelQuery()
@@ -0,0 +1,50 @@
+import os
+import re
+import importlib
+
+SNIFF_BYTES = 512  # Only the start of a file is looked at to guess its language
+
+# name -> (module, class, extensions, pattern matched against the start of the file)
+# Modules are imported the first time their language is used, so unused languages cost nothing at startup
+LANGUAGES = {
+    'python': ('PythonHighlighter', 'PythonHighlighter', ['.py', '.pyw', '.pyi'], r'^#!.*\bpython'),
+    'java': ('JavaHighlighter', 'JavaHighlighter', ['.java'], None),
+    'kotlin': ('KotlinHighlighter', 'KotlinHighlighter', ['.kt', '.kts'], None),
+    'csharp': ('CSharpHighlighter', 'CSharpHighlighter', ['.cs', '.csx'], None),
+    'xml': ('XMLHighlighter', 'XMLHighlighter',
+            ['.xml', '.xsd', '.xsl', '.xslt', '.xaml', '.csproj', '.vbproj', '.props', '.targets', '.pom',
+             '.plist', '.config', '.resx', '.wsdl'], r'^\s*<\?xml\b'),
+    'yaml': ('YAMLHighlighter', 'YAMLHighlighter', ['.yaml', '.yml'], r'^%YAML\b'),
+    'sql': ('SQLHighlighter', 'SQLHighlighter', ['.sql', '.ddl'], None),
+    'shell': ('ShellHighlighter', 'ShellHighlighter', ['.sh', '.bash', '.zsh', '.ksh'],
+              r'^#!.*\b(?:ba|z|k|da)?sh\b'),
+}
+
+EXTENSIONS = {extension: name for name, (_, _, extensions, _) in LANGUAGES.items() for extension in extensions}
+SNIFFERS = [(name, re.compile(pattern, re.MULTILINE)) for name, (_, _, _, pattern) in LANGUAGES.items() if pattern]
+
+def language_for(file_name, head=None):
+    # The extension decides; otherwise head, the start of the file as text, is sniffed for shebangs and markers
+    name = EXTENSIONS.get(os.path.splitext(file_name)[1].lower())
+    if name is not None or not head:
+        return name
+    head = head[:SNIFF_BYTES]
+    for name, pattern in SNIFFERS:
+        if pattern.search(head):
+            return name
+    return None
+
+def sniff_file(file_name):
+    try:
+        with open(file_name, 'rb') as file:
+            head = file.read(SNIFF_BYTES)
+    except OSError:
+        return None
+    return language_for(file_name, head.decode('utf-8', 'replace'))
+
+def highlighter_class(name):
+    module_name, class_name, _, _ = LANGUAGES[name]
+    return getattr(importlib.import_module(module_name), class_name)
+
+def get_lexer(name):
+    return highlighter_class(name).lexer()
@@ -0,0 +1,106 @@
+import time
+from array import array
+from PyQt6.QtGui import QTextLayout
+from PyQt6.QtCore import QObject, QTimer, QPoint, QEvent
+
+LOOKAHEAD_BLOCKS = 100  # Highlighted below the viewport so scrolling doesn't show plain text
+IDLE_SLICE_SECONDS = 0.01  # Background highlighting yields to the event loop after this long
+IDLE_BATCH_BLOCKS = 50
+
+class LazyHighlighter(QObject):
+    """Highlights a read-only QTextEdit on demand instead of up front like QSyntaxHighlighter.
+
+    Visible blocks plus a lookahead are highlighted as soon as they scroll into view; everything else is done in
+    short slices while the event loop is idle. Each block's end state is kept, so a block can be highlighted
+    correctly once the states of the blocks before it are known, which is a cheap scan without formats.
+    """
+
+    def __init__(self, text_edit, lexer):
+        super().__init__(text_edit)
+        self.text_edit = text_edit
+        self.document = text_edit.document()
+        self.lexer = lexer
+        self.block_count = self.document.blockCount()
+        self.exit_states = array('i', bytes(4 * self.block_count))
+        self.known = 0  # End states are known for every block before this one
+        self.done = bytearray(self.block_count)  # Blocks whose formats have been applied
+        self.idle_next = 0
+
+        self.visible_timer = QTimer(self)
+        self.visible_timer.setSingleShot(True)
+        self.visible_timer.setInterval(0)
+        self.visible_timer.timeout.connect(self.highlightVisible)
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setSingleShot(True)
+        self.idle_timer.setInterval(0)
+        self.idle_timer.timeout.connect(self.highlightIdle)
+
+        text_edit.verticalScrollBar().valueChanged.connect(self.scheduleVisible)
+        text_edit.viewport().installEventFilter(self)
+        self.visible_timer.start()
+        self.idle_timer.start()
+
+    def eventFilter(self, watched, event):
+        if event.type() in (QEvent.Type.Resize, QEvent.Type.Show):
+            self.scheduleVisible()
+        return False
+
+    def scheduleVisible(self, *args):
+        self.visible_timer.start()
+
+    def entryState(self, number):
+        return self.exit_states[number - 1] if number > 0 else 0
+
+    def ensureStates(self, number):
+        # Make the state entering block number known, scanning only for strings and comments
+        if self.known >= number:
+            return
+        block = self.document.findBlockByNumber(self.known)
+        while self.known < number:
+            _, state = self.lexer.highlight(block.text(), self.entryState(self.known), tokens=False)
+            self.exit_states[self.known] = state
+            self.known += 1
+            block = block.next()
+
+    def highlightRange(self, first, last):
+        self.ensureStates(first)
+        block = self.document.findBlockByNumber(first)
+        for number in range(first, min(last, self.block_count - 1) + 1):
+            if not self.done[number]:
+                ranges, state = self.lexer.highlight(block.text(), self.entryState(number))
+                self.applyFormats(block, ranges)
+                self.done[number] = 1
+                if number == self.known:
+                    self.exit_states[number] = state
+                    self.known += 1
+            block = block.next()
+
+    def applyFormats(self, block, ranges):
+        format_ranges = []
+        for start, length, text_format in ranges:
+            format_range = QTextLayout.FormatRange()
+            format_range.start = start
+            format_range.length = length
+            format_range.format = text_format
+            format_ranges.append(format_range)
+        block.layout().setFormats(format_ranges)
+        self.document.markContentsDirty(block.position(), block.length())
+
+    def highlightVisible(self):
+        viewport = self.text_edit.viewport()
+        first = self.text_edit.cursorForPosition(QPoint(0, 0)).blockNumber()
+        last = self.text_edit.cursorForPosition(QPoint(0, viewport.height() - 1)).blockNumber()
+        self.highlightRange(first, last + LOOKAHEAD_BLOCKS)
+
+    def highlightIdle(self):
+        deadline = time.perf_counter() + IDLE_SLICE_SECONDS
+        while self.idle_next < self.block_count and time.perf_counter() < deadline:
+            # Blocks are done front to back, so the states needed are always known already
+            self.highlightRange(self.idle_next, self.idle_next + IDLE_BATCH_BLOCKS - 1)
+            self.idle_next += IDLE_BATCH_BLOCKS
+        if self.idle_next < self.block_count:
+            self.idle_timer.start()
+
+    def stop(self):
+        self.visible_timer.stop()
+        self.idle_timer.stop()
@@ -0,0 +1,218 @@
+import os
+import threading
+from array import array
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from PyQt6.QtCore import QThread, QModelIndex, pyqtSignal
+from PyQt6.QtWidgets import QAbstractItemView
+from JSONViewer import JSONViewer, JSONModel, ContainerNode
+from RecordFilter import NEXT_RECORD, filter_records
+import ProcessPool
+
+RECORD_BATCH = 50000  # Offsets handed to the view at once while indexing
+FILTER_CHUNK_BYTES = 16 * 1024 * 1024  # Span of records per filter task
+
+
+class RecordIndexThread(QThread):
+    records = pyqtSignal(object, 'qint64')  # array of record offsets, bytes scanned so far
+
+    def __init__(self, buffer, first, parent=None):
+        super().__init__(parent)
+        self.buffer = buffer
+        self.first = first  # Offset of the first record, or None for an empty file
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def run(self):
+        batch = array('q')
+        if self.first is not None:
+            batch.append(self.first)
+            for match in NEXT_RECORD.finditer(self.buffer, self.first):
+                batch.append(match.end())
+                if len(batch) >= RECORD_BATCH:
+                    if self.cancelled.is_set():
+                        return
+                    self.records.emit(batch, match.end())
+                    batch = array('q')
+        self.records.emit(batch, len(self.buffer))
+
+
+class RecordFilterThread(QThread):
+    progress = pyqtSignal(int, int)  # Chunks done, chunks total
+    matched = pyqtSignal(object)  # Sorted array of matching record numbers
+    failed = pyqtSignal(str)
+
+    def __init__(self, buffer, file_name, record_offsets, key_path, parent=None):
+        super().__init__(parent)
+        self.buffer = buffer
+        self.file_name = file_name  # Processes remap the file by name; in-memory buffers stay in threads
+        self.record_offsets = record_offsets
+        self.key_path = key_path
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def chunks(self):
+        # (start, end, first record) spans ending on record boundaries
+        offsets = self.record_offsets
+        first = 0
+        while first < len(offsets):
+            last = max(bisect_left(offsets, offsets[first] + FILTER_CHUNK_BYTES), first + 1)
+            yield offsets[first], offsets[last] if last < len(offsets) else len(self.buffer), first
+            first = last
+
+    def run(self):
+        try:
+            with ThreadPoolExecutor(max_workers=min(8, (os.cpu_count() or 1) * 2)) as thread_pool:
+                if self.file_name is not None:
+                    submit, source = ProcessPool.submit, self.file_name
+                else:
+                    submit, source = thread_pool.submit, self.buffer
+                futures = [submit(filter_records, source, start, end, first, self.key_path)
+                           for start, end, first in self.chunks()]
+                done = 0
+                for future in as_completed(futures):
+                    if self.cancelled.is_set():
+                        for pending in futures:
+                            pending.cancel()
+                        return
+                    future.result()
+                    done += 1
+                    self.progress.emit(done, len(futures))
+            # Chunks are in record order, so their results concatenate sorted
+            matches = array('q')
+            for future in futures:
+                matches.extend(future.result())
+            self.matched.emit(matches)
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
+class NDJSONModel(JSONModel):
+    # One top-level row per record; record_numbers maps rows to records while a filter is applied
+
+    def __init__(self, json_index, icons, parent=None):
+        super().__init__(json_index, icons, parent)
+        self.record_offsets = array('q')
+        self.record_numbers = None
+        self.root = ContainerNode(None, None, 0, False)
+        self.root.offsets = self.record_offsets
+
+    def key(self, node, row):
+        if node is self.root:
+            return str(self.record_numbers[row] if self.record_numbers is not None else row)
+        return super().key(node, row)
+
+    def appendRecords(self, offsets):
+        if self.record_numbers is not None or not offsets:
+            self.record_offsets.extend(offsets)
+            return
+        first = len(self.record_offsets)
+        self.beginInsertRows(QModelIndex(), first, first + len(offsets) - 1)
+        self.record_offsets.extend(offsets)
+        self.endInsertRows()
+
+    def setRecordNumbers(self, record_numbers):
+        # None shows every record
+        self.beginResetModel()
+        self.record_numbers = record_numbers
+        self.root = ContainerNode(None, None, 0, False)
+        if record_numbers is None:
+            self.root.offsets = self.record_offsets
+        else:
+            self.root.offsets = array('q', (self.record_offsets[number] for number in record_numbers))
+        self.endResetModel()
+
+    def rowForRecord(self, number):
+        # The record itself, or the first shown after it
+        if self.record_numbers is None:
+            return min(number, len(self.record_offsets) - 1)
+        return min(bisect_left(self.record_numbers, number), len(self.record_numbers) - 1)
+
+
+class NDJSONViewer(JSONViewer):
+    """JSONViewer for JSON Lines, with one top-level row per record.
+
+    Record offsets are indexed in the background, so any record is a direct lookup, and only the records that
+    are displayed get parsed. Filters run over chunks of records in a worker pool.
+    """
+
+    model_class = NDJSONModel
+
+    def __init__(self, buffer, file_name=None):
+        super().__init__(buffer)
+        self.buffer = buffer
+        self.file_name = file_name
+        self.indexed = False
+        self.filter_thread = None
+        self.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        json_index = self.json_model.json_index
+        self.index_thread = RecordIndexThread(buffer, json_index.root if json_index is not None else None, self)
+        self.index_thread.records.connect(self.addRecords)
+        self.index_thread.finished.connect(self.indexingFinished)
+        self.index_thread.start()
+
+    def addRecords(self, offsets, scanned):
+        self.json_model.appendRecords(offsets)
+        if not self.indexed:
+            percent = scanned * 100 // max(len(self.buffer), 1)
+            self.status.emit(f"Indexing: {len(self.json_model.record_offsets):,} records ({percent}%)")
+
+    def indexingFinished(self):
+        if self.index_thread.cancelled.is_set():
+            return
+        self.indexed = True
+        self.status.emit(f"{len(self.json_model.record_offsets):,} records")
+
+    def goToRecord(self, number):
+        row = self.json_model.rowForRecord(number)
+        if row < 0:
+            return
+        index = self.json_model.index(row, 0)
+        self.scrollTo(index, QAbstractItemView.ScrollHint.PositionAtTop)
+        self.setCurrentIndex(index)
+
+    def setFilter(self, key_path):
+        # Empty shows every record again; filtering waits for the index, since it works on record boundaries
+        self.cancelFilter()
+        key_path = key_path.strip()
+        if not key_path:
+            self.json_model.setRecordNumbers(None)
+            if self.indexed:
+                self.status.emit(f"{len(self.json_model.record_offsets):,} records")
+            return
+        if not self.indexed:
+            self.status.emit("Filtering is available once indexing has finished")
+            return
+        self.filter_thread = RecordFilterThread(self.buffer, self.file_name, self.json_model.record_offsets,
+                                                key_path, self)
+        self.filter_thread.progress.connect(self.filterProgress)
+        self.filter_thread.matched.connect(self.filterMatched)
+        self.filter_thread.failed.connect(self.status.emit)
+        self.filter_thread.start()
+        self.status.emit("Filtering…")
+
+    def filterProgress(self, done, total):
+        if self.sender() is self.filter_thread:
+            self.status.emit(f"Filtering: {done}/{total} chunks")
+
+    def filterMatched(self, record_numbers):
+        if self.sender() is not self.filter_thread:
+            return
+        self.json_model.setRecordNumbers(record_numbers)
+        self.status.emit(f"{len(record_numbers):,} of {len(self.json_model.record_offsets):,} records match")
+
+    def cancelFilter(self):
+        if self.filter_thread is not None:
+            self.filter_thread.cancel()
+            self.filter_thread.wait()
+            self.filter_thread = None
+
+    def stop(self):
+        super().stop()
+        self.cancelFilter()
+        self.index_thread.cancel()
+        self.index_thread.wait()
@@ -0,0 +1,294 @@
+import os
+import threading
+import itertools
+from collections import OrderedDict
+import fitz  # PyMuPDF for PDF rendering
+from PyQt6.QtWidgets import QScrollArea, QWidget, QVBoxLayout
+from PyQt6.QtGui import QImage, QPainter, QColor
+from PyQt6.QtCore import Qt, QTimer, QRect, QRectF, QObject, QRunnable, QThreadPool, pyqtSignal
+from DiskCache import get_cache
+
+TILE_SIZE = 512  # Tile edge in device pixels at the current zoom
+PREVIEW_ZOOM = 0.25  # Low-resolution previews are shown scaled up while sharp tiles render
+CACHED_TILE_ZOOM = 1.0  # Tiles at other zoom levels are transient and would only churn the disk cache
+
+# fitz documents must not be shared between threads, so every worker opens its own copy
+_thread_state = threading.local()
+_document_ids = itertools.count()
+
+def open_document(source):
+    # source is a path, or the raw bytes of a PDF held in memory
+    if isinstance(source, str):
+        return fitz.open(source)
+    return fitz.open(stream=source, filetype="pdf")
+
+def _thread_document(document_id, source):
+    docs = getattr(_thread_state, 'docs', None)
+    if docs is None:
+        docs = _thread_state.docs = {}
+    if document_id not in docs:
+        docs[document_id] = open_document(source)
+    return docs[document_id]
+
+
+class PDFRenderSignals(QObject):
+    rendered = pyqtSignal(object, QImage)
+    failed = pyqtSignal(object, str)
+
+
+class PDFRenderTask(QRunnable):
+    # key is ('preview', page) or ('tile', page, zoom, tx, ty)
+    def __init__(self, document_id, source, cache_key, key, zoom_level, clip, signals):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.document_id = document_id
+        self.source = source
+        self.cache_key = cache_key
+        self.key = key
+        self.zoom_level = zoom_level
+        self.clip = clip
+        self.signals = signals
+
+    def run(self):
+        cache = get_cache()
+        kind = "pdf-" + "-".join(str(part) for part in self.key)
+        cacheable = self.cache_key and (self.key[0] == 'preview' or self.zoom_level == CACHED_TILE_ZOOM)
+        data = cache.get(self.cache_key, kind) if cacheable else None
+        if data is not None:
+            img = QImage.fromData(data, "PNG")
+            if not img.isNull():
+                self.signals.rendered.emit(self.key, img.convertToFormat(QImage.Format.Format_RGB32))
+                return
+        try:
+            page = _thread_document(self.document_id, self.source)[self.key[1]]
+            pix = page.get_pixmap(matrix=fitz.Matrix(self.zoom_level, self.zoom_level), clip=self.clip)
+            # Converting also copies the data out of the fitz pixmap buffer
+            img = QImage(pix.samples, pix.width, pix.height, pix.stride, QImage.Format.Format_RGB888)
+            img = img.convertToFormat(QImage.Format.Format_RGB32)
+        except Exception as e:
+            self.signals.failed.emit(self.key, str(e))
+            return
+        self.signals.rendered.emit(self.key, img)
+        if cacheable:
+            cache.put(self.cache_key, kind, pix.tobytes("png"))
+
+
+class PDFPageWidget(QWidget):
+    def __init__(self, viewer, index):
+        super().__init__()
+        self.viewer = viewer
+        self.index = index
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(event.rect(), Qt.GlobalColor.white)
+        error = self.viewer.render_errors.get(self.index)
+        if error is not None:
+            painter.setPen(QColor("red"))
+            painter.drawText(self.rect(), Qt.AlignmentFlag.AlignCenter | Qt.TextFlag.TextWordWrap,
+                             f"Failed to render page {self.index + 1}: {error}")
+        preview = self.viewer.preview_cache.get(self.index)
+        if preview is not None:
+            painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+            painter.drawImage(QRectF(self.rect()), preview)
+        for tile_rect, img in self.viewer.cachedTiles(self.index, event.rect()):
+            painter.drawImage(QRectF(tile_rect), img)
+        painter.setPen(QColor("#dcdcdc"))
+        painter.drawRect(self.rect().adjusted(0, 0, -1, -1))
+
+
+class PDFViewer(QScrollArea):
+    # Caps hold regardless of zoom level or document length
+    MAX_TILE_BYTES = 128 * 1024 * 1024
+    MAX_PREVIEW_BYTES = 64 * 1024 * 1024
+
+    def __init__(self, source, cache_key=None):
+        super().__init__()
+        self.source = source
+        self.document_id = next(_document_ids)
+        self.doc = open_document(source)
+        self.cache_key = cache_key
+        self.zoom_level = 1.0
+        self.tile_cache = OrderedDict()  # ('tile', page, zoom, tx, ty) -> QImage, least recently used first
+        self.tile_bytes = 0
+        self.preview_cache = OrderedDict()  # page -> QImage, least recently used first
+        self.preview_bytes = 0
+        self.pending = {}  # key -> queued PDFRenderTask
+        self.wanted = set()
+        self.render_errors = {}  # page -> message; failed pages aren't requested again
+
+        self.render_pool = QThreadPool(self)
+        self.render_pool.setMaxThreadCount(os.cpu_count() or 1)
+        self.render_signals = PDFRenderSignals(self)
+        self.render_signals.rendered.connect(self.rendered)
+        self.render_signals.failed.connect(self.renderFailed)
+
+        self.setWidgetResizable(True)
+        self.setAlignment(Qt.AlignmentFlag.AlignHCenter)
+
+        self.container = QWidget()
+        self.pdf_layout = QVBoxLayout(self.container)
+        self.setWidget(self.container)
+
+        # Pages are sized from their rectangles, nothing is rasterized yet
+        self.page_rects = [page.rect for page in self.doc]
+        self.page_widgets = []
+        for index in range(len(self.page_rects)):
+            page_widget = PDFPageWidget(self, index)
+            self.pdf_layout.addWidget(page_widget, alignment=Qt.AlignmentFlag.AlignHCenter)
+            self.page_widgets.append(page_widget)
+        self.resizePages()
+
+        # Coalesce bursts of scroll/resize events into a single render pass
+        self.update_timer = QTimer(self)
+        self.update_timer.setSingleShot(True)
+        self.update_timer.setInterval(0)
+        self.update_timer.timeout.connect(self.requestVisibleTiles)
+        self.verticalScrollBar().valueChanged.connect(self.scheduleUpdate)
+        self.horizontalScrollBar().valueChanged.connect(self.scheduleUpdate)
+
+    def resizePages(self):
+        for page_widget, rect in zip(self.page_widgets, self.page_rects):
+            page_widget.setFixedSize(int(rect.width * self.zoom_level), int(rect.height * self.zoom_level))
+
+    def scheduleUpdate(self, *args):
+        self.update_timer.start()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.scheduleUpdate()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.scheduleUpdate()
+
+    def stopRendering(self):
+        self.render_pool.clear()
+        self.render_pool.waitForDone()
+        self.pending.clear()
+
+    def setZoom(self, zoom_level):
+        if zoom_level == self.zoom_level:
+            return
+        self.zoom_level = zoom_level
+        # Queued tiles and rendered tiles are at the wrong resolution now; previews stay valid
+        stale = {key for key in self.pending if key[0] == 'tile'}
+        self.cancelPending(self.pending.keys() - stale)
+        for key in stale:
+            self.pending.pop(key, None)
+        self.wanted -= stale
+        self.tile_cache.clear()
+        self.tile_bytes = 0
+        self.resizePages()
+        self.scheduleUpdate()
+
+    def tileRect(self, index, tx, ty):
+        rect = self.page_rects[index]
+        width = int(rect.width * self.zoom_level)
+        height = int(rect.height * self.zoom_level)
+        x, y = tx * TILE_SIZE, ty * TILE_SIZE
+        return QRect(x, y, min(TILE_SIZE, width - x), min(TILE_SIZE, height - y))
+
+    def tilesIn(self, index, rect):
+        # Tile coordinates covering rect, given in page widget coordinates
+        rect = rect.intersected(self.page_widgets[index].rect())
+        if rect.isEmpty():
+            return []
+        return [(tx, ty)
+                for ty in range(rect.top() // TILE_SIZE, rect.bottom() // TILE_SIZE + 1)
+                for tx in range(rect.left() // TILE_SIZE, rect.right() // TILE_SIZE + 1)]
+
+    def cachedTiles(self, index, rect):
+        for tx, ty in self.tilesIn(index, rect):
+            img = self.tile_cache.get(('tile', index, self.zoom_level, tx, ty))
+            if img is not None:
+                yield self.tileRect(index, tx, ty), img
+
+    def requestVisibleTiles(self):
+        # Viewport in container coordinates; previews are prefetched one viewport away, tiles half a viewport
+        viewport = self.viewport().rect()
+        left = self.horizontalScrollBar().value()
+        top = self.verticalScrollBar().value()
+        visible = QRect(left, top, viewport.width(), viewport.height())
+        preview_area = visible.adjusted(0, -viewport.height(), 0, viewport.height())
+        tile_area = visible.adjusted(-viewport.width() // 2, -viewport.height() // 2,
+                                     viewport.width() // 2, viewport.height() // 2)
+        centre = visible.center()
+
+        previews = []
+        tiles = []
+        for index, page_widget in enumerate(self.page_widgets):
+            geometry = page_widget.geometry()
+            if index in self.render_errors or not geometry.intersects(preview_area):
+                continue
+            previews.append((abs(geometry.center().y() - centre.y()), ('preview', index)))
+            for tx, ty in self.tilesIn(index, tile_area.translated(-geometry.topLeft())):
+                tile_centre = self.tileRect(index, tx, ty).translated(geometry.topLeft()).center()
+                distance = (tile_centre - centre).manhattanLength()
+                tiles.append((distance, ('tile', index, self.zoom_level, tx, ty)))
+
+        # Previews first so every page shows something instantly, then tiles closest to the centre
+        ordered = [key for _, key in sorted(previews)] + [key for _, key in sorted(tiles)]
+        self.wanted = set(ordered)
+        self.cancelPending(self.wanted)
+
+        for priority, key in enumerate(reversed(ordered)):
+            cache = self.preview_cache if key[0] == 'preview' else self.tile_cache
+            cache_key = key[1] if key[0] == 'preview' else key
+            if cache_key in cache:
+                cache.move_to_end(cache_key)
+            elif key not in self.pending:
+                if key[0] == 'preview':
+                    task = PDFRenderTask(self.document_id, self.source, self.cache_key, key, PREVIEW_ZOOM, None,
+                                         self.render_signals)
+                else:
+                    task = PDFRenderTask(self.document_id, self.source, self.cache_key, key, self.zoom_level,
+                                         self.tileClip(key[1], key[3], key[4]), self.render_signals)
+                self.pending[key] = task
+                self.render_pool.start(task, priority)
+
+    def tileClip(self, index, tx, ty):
+        rect = self.page_rects[index]
+        tile = self.tileRect(index, tx, ty)
+        zoom = self.zoom_level
+        return fitz.Rect(rect.x0 + tile.left() / zoom, rect.y0 + tile.top() / zoom,
+                         rect.x0 + (tile.left() + tile.width()) / zoom, rect.y0 + (tile.top() + tile.height()) / zoom)
+
+    def cancelPending(self, keep):
+        # Tasks still waiting in the queue are dropped; ones already running finish and are ignored
+        for key, task in list(self.pending.items()):
+            if key not in keep and self.render_pool.tryTake(task):
+                del self.pending[key]
+
+    def rendered(self, key, img):
+        self.pending.pop(key, None)
+        if key not in self.wanted:
+            return
+        index = key[1]
+        if key[0] == 'preview':
+            self.preview_cache[index] = img
+            self.preview_bytes += img.sizeInBytes()
+            self.preview_bytes = self.evict(self.preview_cache, self.preview_bytes, self.MAX_PREVIEW_BYTES,
+                                            lambda page: ('preview', page))
+            self.page_widgets[index].update()
+        else:
+            self.tile_cache[key] = img
+            self.tile_bytes += img.sizeInBytes()
+            self.tile_bytes = self.evict(self.tile_cache, self.tile_bytes, self.MAX_TILE_BYTES, lambda k: k)
+            self.page_widgets[index].update(self.tileRect(index, key[3], key[4]))
+
+    def renderFailed(self, key, message):
+        self.pending.pop(key, None)
+        self.render_errors[key[1]] = message
+        self.page_widgets[key[1]].update()
+
+    def evict(self, cache, used, limit, wanted_key):
+        # Drop least recently used entries, but never the ones around the viewport
+        for cache_key in list(cache):
+            if used <= limit:
+                break
+            if wanted_key(cache_key) not in self.wanted:
+                used -= cache.pop(cache_key).sizeInBytes()
+                page_widget = self.page_widgets[cache_key if isinstance(cache_key, int) else cache_key[1]]
+                page_widget.update()
+        return used
@@ -1,31 +1,211 @@
 import pefile
-import tempfile
 import os
-from PyQt6.QtWidgets import QTreeWidget, QTreeWidgetItem, QVBoxLayout, QWidget, QPushButton, QHBoxLayout, QFileDialog, QMessageBox, QSplitter
+import math
+import hashlib
+import threading
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from PyQt6.QtWidgets import QTreeWidget, QTreeWidgetItem, QVBoxLayout, QWidget, QPushButton, QHBoxLayout, QFileDialog, QMessageBox, QSplitter, QLineEdit
 from PyQt6.QtGui import QFont, QColor, QIcon
-from PyQt6.QtCore import Qt, QUrl
+from PyQt6.QtCore import Qt, QUrl, QThread, pyqtSignal
 from PyQt6.QtGui import QDesktopServices
+from VirtualFile import VirtualFile
+from TextViewer import map_file
+
+try:
+    import numpy
+except ImportError:
+    numpy = None  # Entropy falls back to bytes.count, which is slower but still runs in C
+
+# Tree node -> data directory parsed when the node is first expanded
+LAZY_DIRECTORIES = [
+    ("Imports", 'IMAGE_DIRECTORY_ENTRY_IMPORT'),
+    ("Exports", 'IMAGE_DIRECTORY_ENTRY_EXPORT'),
+    ("Relocations", 'IMAGE_DIRECTORY_ENTRY_BASERELOC'),
+]
+RESOURCE_DIRECTORY = 'IMAGE_DIRECTORY_ENTRY_RESOURCE'
+SYMBOL_BATCH = 1000  # Symbols added to the tree per expand or "Show more" click
+SHOW_MORE = 'show_more'  # UserRole of the item that adds the next batch
+
+def symbol_name(name, ordinal):
+    return name.decode('utf-8', 'replace') if name is not None else f"Ordinal {ordinal}"
+
+
+class SymbolIndex:
+    """Import or export symbols, plus their order by lowercase name so a name prefix selects a contiguous run."""
+
+    def __init__(self, symbols):
+        self.symbols = symbols  # (name, address) in table order
+        self.order = sorted(range(len(symbols)), key=lambda position: symbols[position][0].lower())
+        self.keys = [symbols[position][0].lower() for position in self.order]
+
+    def matching(self, prefix):
+        # Positions into symbols: table order without a prefix, name order with one
+        if not prefix:
+            return range(len(self.symbols))
+        prefix = prefix.lower()
+        start = bisect_left(self.keys, prefix)
+        return self.order[start:bisect_left(self.keys, prefix + '\U0010ffff', start)]
+
+
+class SymbolNode:
+    __slots__ = ('index', 'positions', 'shown')
+
+    def __init__(self, index):
+        self.index = index
+        self.positions = range(0)  # Symbols passing the filter
+        self.shown = 0  # How many of them have tree items
+
+# Built in the worker right after parsing, so sorting tens of thousands of names stays off the GUI thread
+
+def import_symbols(pe):
+    return [(entry.dll.decode('utf-8', 'replace'),
+             SymbolIndex([(symbol_name(imp.name, imp.ordinal), imp.address) for imp in entry.imports]))
+            for entry in getattr(pe, 'DIRECTORY_ENTRY_IMPORT', [])]
+
+def export_symbols(pe):
+    if not hasattr(pe, 'DIRECTORY_ENTRY_EXPORT'):
+        return SymbolIndex([])
+    return SymbolIndex([(symbol_name(exp.name, exp.ordinal), exp.address)
+                        for exp in pe.DIRECTORY_ENTRY_EXPORT.symbols])
+
+PREPARE = {'IMAGE_DIRECTORY_ENTRY_IMPORT': import_symbols, 'IMAGE_DIRECTORY_ENTRY_EXPORT': export_symbols}
+ANALYSIS_CHUNK = 16 * 1024 * 1024  # Section bytes hashed and counted at a time
+HIGH_ENTROPY = 7.2  # Sections above this are usually packed or encrypted
+
+def byte_counts(data):
+    if numpy is not None:
+        return numpy.bincount(numpy.frombuffer(data, dtype=numpy.uint8), minlength=256)
+    return [data.count(bytes([byte])) for byte in range(256)]
+
+def analyze_section(buffer, start, size):
+    # Shannon entropy, MD5 and SHA-256 of a section's raw data; hashlib releases the GIL on large updates
+    md5 = hashlib.md5()
+    sha256 = hashlib.sha256()
+    counts = numpy.zeros(256, dtype=numpy.int64) if numpy is not None else [0] * 256
+    for position in range(start, start + size, ANALYSIS_CHUNK):
+        chunk = buffer[position:min(position + ANALYSIS_CHUNK, start + size)]
+        md5.update(chunk)
+        sha256.update(chunk)
+        if numpy is not None:
+            counts += byte_counts(chunk)
+        else:
+            counts = [total + count for total, count in zip(counts, byte_counts(chunk))]
+    entropy = 0.0
+    if size:
+        if numpy is not None:
+            probabilities = counts[counts > 0] / size
+            entropy = float(-(probabilities * numpy.log2(probabilities)).sum())
+        else:
+            entropy = -sum(count / size * math.log2(count / size) for count in counts if count)
+    return entropy, md5.hexdigest(), sha256.hexdigest()
+
+
+class DirectoryThread(QThread):
+    parsed = pyqtSignal(str)  # Directory name
+    failed = pyqtSignal(str, str)  # Directory name, error
+
+    def __init__(self, pe, lock, directory, parent=None):
+        super().__init__(parent)
+        self.pe = pe
+        self.lock = lock
+        self.directory = directory
+        self.result = None  # What PREPARE builds from the parsed directory, if anything
+
+    def run(self):
+        try:
+            # pefile isn't thread safe, so directories are parsed one at a time
+            with self.lock:
+                # pefile sets DIRECTORY_ENTRY_* once a directory is parsed, e.g. imports for the imphash
+                if not hasattr(self.pe, self.directory.replace('IMAGE_', '', 1)):
+                    self.pe.parse_data_directories(directories=[pefile.DIRECTORY_ENTRY[self.directory]])
+                if self.directory in PREPARE:
+                    self.result = PREPARE[self.directory](self.pe)
+        except Exception as e:
+            self.failed.emit(self.directory, str(e))
+            return
+        self.parsed.emit(self.directory)
+
+
+class SectionAnalysisThread(QThread):
+    section_analyzed = pyqtSignal(int, float, str, str)  # Section number, entropy, MD5, SHA-256
+    imphash_ready = pyqtSignal(str)
+
+    def __init__(self, pe, lock, buffer, with_imphash, expansions_pending, parent=None):
+        super().__init__(parent)
+        self.pe = pe
+        self.lock = lock
+        self.buffer = buffer
+        self.with_imphash = with_imphash
+        self.expansions_pending = expansions_pending  # True while nodes the user expanded are being parsed
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def run(self):
+        # Raw data ranges, clipped to the file for truncated or malformed section tables
+        ranges = [(min(section.PointerToRawData, len(self.buffer)),
+                   max(0, min(section.SizeOfRawData, len(self.buffer) - section.PointerToRawData)))
+                  for section in self.pe.sections]
+        with ThreadPoolExecutor(max_workers=min(8, (os.cpu_count() or 1) * 2)) as pool:
+            futures = {pool.submit(analyze_section, self.buffer, start, size): number
+                       for number, (start, size) in enumerate(ranges)}
+            for future in as_completed(futures):
+                if self.cancelled.is_set():
+                    for pending in futures:
+                        pending.cancel()
+                    return
+                self.section_analyzed.emit(futures[future], *future.result())
+        if not self.with_imphash:
+            return
+        # Parsing the imports holds the lock for a while, so nodes the user is waiting on are served first
+        while self.expansions_pending() and not self.cancelled.is_set():
+            self.msleep(50)
+        if self.cancelled.is_set():
+            return
+        with self.lock:
+            if not hasattr(self.pe, 'DIRECTORY_ENTRY_IMPORT'):
+                import_directory = pefile.DIRECTORY_ENTRY['IMAGE_DIRECTORY_ENTRY_IMPORT']
+                self.pe.parse_data_directories(directories=[import_directory])
+            self.imphash_ready.emit(self.pe.get_imphash() or "")
+
 
 class PEViewer(QWidget):
     def __init__(self, file_name, main_viewer):
         super().__init__()
         self.file_name = file_name
         self.main_viewer = main_viewer
-        self.temp_dir = tempfile.mkdtemp()
-        self.resource_data = {}
+        self.resources = {}  # file name -> (RVA, size, type name); the bytes are only read when needed
+        self.pe = None
+        self.file_map = None
+        self.parse_lock = threading.Lock()
+        self.directory_threads = {}  # directory name -> DirectoryThread, kept once finished
+        self.directory_items = {}  # directory name -> tree node showing it
+        self.symbol_nodes = {}  # Imported DLL or Exports tree item -> SymbolNode
+        self.section_items = []
+        self.imphash_item = None
+        self.analysis_thread = None
         self.initUI()
 
     def initUI(self):
         layout = QVBoxLayout(self)
         
+        self.symbol_filter = QLineEdit()
+        self.symbol_filter.setPlaceholderText("Filter imports and exports by name prefix")
+        self.symbol_filter.textChanged.connect(self.apply_symbol_filter)
+        layout.addWidget(self.symbol_filter)
+
         splitter = QSplitter(Qt.Orientation.Vertical)
         layout.addWidget(splitter)
 
         # PE Structure Tree
         self.pe_tree = QTreeWidget()
-        self.pe_tree.setHeaderLabels(["Field", "Value"])
+        self.pe_tree.setHeaderLabels(["Field", "Value", "Entropy", "MD5", "SHA-256"])
         self.pe_tree.setAlternatingRowColors(True)
         self.pe_tree.setColumnWidth(0, 300)
+        self.pe_tree.itemExpanded.connect(self.directory_expanded)
+        self.pe_tree.itemClicked.connect(self.symbol_item_clicked)
         splitter.addWidget(self.pe_tree)
 
         # Resources Tree
@@ -48,13 +228,16 @@ class PEViewer(QWidget):
 
     def load_pe(self):
         try:
-            pe = pefile.PE(self.file_name)
+            # Only the headers and section table are read here; data directories are parsed in the background
+            pe = self.pe = pefile.PE(self.file_name, fast_load=True)
 
             # Load PE structure
             self.load_pe_structure(pe)
 
-            # Load resources
-            self.load_resources(pe)
+            # Load resources, which have a pane of their own and so are parsed right away
+            if self.has_directory(RESOURCE_DIRECTORY):
+                self.resources_tree.addTopLevelItem(QTreeWidgetItem(["Loading…"]))
+                self.parse_directory(RESOURCE_DIRECTORY)
 
         except pefile.PEFormatError as e:
             error_item = QTreeWidgetItem(["Error", f"Failed to parse PE file: {str(e)}"])
@@ -89,30 +272,159 @@ class PEViewer(QWidget):
         for section in pe.sections:
             section_item = QTreeWidgetItem([section.Name.decode().strip(), ""])
             sections.addChild(section_item)
+            self.section_items.append(section_item)
             section_item.addChild(QTreeWidgetItem(["Virtual Address", hex(section.VirtualAddress)]))
             section_item.addChild(QTreeWidgetItem(["Virtual Size", hex(section.Misc_VirtualSize)]))
             section_item.addChild(QTreeWidgetItem(["Raw Data Size", hex(section.SizeOfRawData)]))
             section_item.addChild(QTreeWidgetItem(["Pointer to Raw Data", hex(section.PointerToRawData)]))
             section_item.addChild(QTreeWidgetItem(["Characteristics", hex(section.Characteristics)]))
 
-        # Add Imports
-        if hasattr(pe, 'DIRECTORY_ENTRY_IMPORT'):
-            imports = QTreeWidgetItem(["Imports"])
-            self.pe_tree.addTopLevelItem(imports)
-            for entry in pe.DIRECTORY_ENTRY_IMPORT:
-                dll_item = QTreeWidgetItem([entry.dll.decode(), ""])
-                imports.addChild(dll_item)
-                for imp in entry.imports:
-                    imp_item = QTreeWidgetItem([str(imp.name), hex(imp.address)])
-                    dll_item.addChild(imp_item)
-
-        # Add Exports
-        if hasattr(pe, 'DIRECTORY_ENTRY_EXPORT'):
-            exports = QTreeWidgetItem(["Exports"])
-            self.pe_tree.addTopLevelItem(exports)
-            for exp in pe.DIRECTORY_ENTRY_EXPORT.symbols:
-                item = QTreeWidgetItem([str(exp.name), hex(exp.address)])
-                exports.addChild(item)
+        # Entropy and hashes per section, plus the imphash, are computed in the background
+        if self.has_directory('IMAGE_DIRECTORY_ENTRY_IMPORT'):
+            self.imphash_item = QTreeWidgetItem(["Imphash", "Computing…"])
+            self.pe_tree.addTopLevelItem(self.imphash_item)
+        for section_item in self.section_items:
+            section_item.setText(2, "…")
+        self.analyze_sections()
+
+        # Imports, exports and relocations are filled in when expanded
+        for title, directory in LAZY_DIRECTORIES:
+            if self.has_directory(directory):
+                item = QTreeWidgetItem([title])
+                item.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.ShowIndicator)
+                item.setData(0, Qt.ItemDataRole.UserRole, directory)
+                self.pe_tree.addTopLevelItem(item)
+                self.directory_items[directory] = item
+
+    def analyze_sections(self):
+        if self.file_map is None:
+            self.file_map = map_file(self.file_name)
+        self.analysis_thread = SectionAnalysisThread(self.pe, self.parse_lock, self.file_map,
+                                                     self.imphash_item is not None, self.expansions_pending, self)
+        self.analysis_thread.section_analyzed.connect(self.section_analyzed)
+        self.analysis_thread.imphash_ready.connect(self.imphash_ready)
+        self.analysis_thread.start()
+
+    def section_analyzed(self, number, entropy, md5, sha256):
+        section_item = self.section_items[number]
+        section_item.setText(2, f"{entropy:.3f}")
+        section_item.setText(3, md5)
+        section_item.setText(4, sha256)
+        if entropy >= HIGH_ENTROPY:
+            section_item.setForeground(2, QColor("red"))
+
+    def imphash_ready(self, imphash):
+        self.imphash_item.setText(1, imphash or "None")
+
+    def expansions_pending(self):
+        # Called from the analysis thread; list() takes the threads in one step while the GUI may add more
+        return any(thread.isRunning() for thread in list(self.directory_threads.values()))
+
+    def has_directory(self, directory):
+        index = pefile.DIRECTORY_ENTRY[directory]
+        entries = self.pe.OPTIONAL_HEADER.DATA_DIRECTORY
+        return index < len(entries) and entries[index].VirtualAddress != 0 and entries[index].Size != 0
+
+    def directory_expanded(self, item):
+        node = self.symbol_nodes.get(item)
+        if node is not None:
+            if node.shown == 0:
+                self.show_more_symbols(item)
+            return
+        directory = item.data(0, Qt.ItemDataRole.UserRole)
+        if directory is None or directory in self.directory_threads:
+            return
+        item.addChild(QTreeWidgetItem(["Loading…"]))
+        self.parse_directory(directory)
+
+    def parse_directory(self, directory):
+        thread = DirectoryThread(self.pe, self.parse_lock, directory, self)
+        thread.parsed.connect(self.directory_parsed)
+        thread.failed.connect(self.directory_failed)
+        self.directory_threads[directory] = thread
+        thread.start()
+
+    def directory_parsed(self, directory):
+        if directory == RESOURCE_DIRECTORY:
+            self.resources_tree.clear()
+            self.load_resources(self.pe)
+            return
+        item = self.directory_items[directory]
+        item.takeChildren()
+        result = self.directory_threads[directory].result
+        if directory == 'IMAGE_DIRECTORY_ENTRY_IMPORT':
+            self.load_imports(item, result)
+        elif directory == 'IMAGE_DIRECTORY_ENTRY_EXPORT':
+            self.add_symbol_node(item, result)
+        else:
+            self.load_relocations(item)
+        if item.childCount() == 0:
+            item.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.DontShowIndicatorWhenChildless)
+
+    def directory_failed(self, directory, message):
+        error_item = QTreeWidgetItem(["Error", f"Failed to parse: {message}"])
+        error_item.setForeground(1, QColor("red"))
+        if directory == RESOURCE_DIRECTORY:
+            self.resources_tree.clear()
+            self.resources_tree.addTopLevelItem(error_item)
+            return
+        item = self.directory_items[directory]
+        item.takeChildren()
+        item.addChild(error_item)
+
+    def load_imports(self, imports, dlls):
+        for dll_name, symbol_index in dlls:
+            dll_item = QTreeWidgetItem([dll_name, ""])
+            imports.addChild(dll_item)
+            self.add_symbol_node(dll_item, symbol_index)
+
+    def add_symbol_node(self, item, symbol_index):
+        # Symbol items are only created when the node is expanded, a batch at a time
+        self.symbol_nodes[item] = SymbolNode(symbol_index)
+        self.show_symbols(item)
+
+    def show_symbols(self, item):
+        node = self.symbol_nodes[item]
+        prefix = self.symbol_filter.text().strip()
+        node.positions = node.index.matching(prefix)
+        node.shown = 0
+        item.takeChildren()
+        total = len(node.index.symbols)
+        item.setText(1, f"{len(node.positions):,} of {total:,}" if prefix else f"{total:,}")
+        item.setChildIndicatorPolicy(QTreeWidgetItem.ChildIndicatorPolicy.ShowIndicator if node.positions
+                                     else QTreeWidgetItem.ChildIndicatorPolicy.DontShowIndicatorWhenChildless)
+        if item.parent() is not None:
+            item.setHidden(bool(prefix) and not node.positions)  # DLLs without a match
+        if item.isExpanded():
+            self.show_more_symbols(item)
+
+    def show_more_symbols(self, item):
+        node = self.symbol_nodes[item]
+        last = item.child(item.childCount() - 1)
+        if last is not None and last.data(0, Qt.ItemDataRole.UserRole) == SHOW_MORE:
+            item.removeChild(last)
+        batch = node.positions[node.shown:node.shown + SYMBOL_BATCH]
+        symbols = node.index.symbols
+        item.addChildren([QTreeWidgetItem([symbols[position][0], hex(symbols[position][1])]) for position in batch])
+        node.shown += len(batch)
+        remaining = len(node.positions) - node.shown
+        if remaining:
+            more_item = QTreeWidgetItem([f"Show more ({remaining:,} remaining)"])
+            more_item.setData(0, Qt.ItemDataRole.UserRole, SHOW_MORE)
+            item.addChild(more_item)
+
+    def symbol_item_clicked(self, item, column):
+        if item.data(0, Qt.ItemDataRole.UserRole) == SHOW_MORE:
+            self.show_more_symbols(item.parent())
+
+    def apply_symbol_filter(self, text):
+        for item in self.symbol_nodes:
+            self.show_symbols(item)
+
+    def load_relocations(self, relocations):
+        for block in getattr(self.pe, 'DIRECTORY_ENTRY_BASERELOC', []):
+            item = QTreeWidgetItem([hex(block.struct.VirtualAddress), f"{len(block.entries)} entries"])
+            relocations.addChild(item)
 
     def load_resources(self, pe):
         if hasattr(pe, 'DIRECTORY_ENTRY_RESOURCE'):
@@ -134,14 +446,35 @@ class PEViewer(QWidget):
                     for resource_lang in resource_id.directory.entries:
                         data_rva = resource_lang.data.struct.OffsetToData
                         size = resource_lang.data.struct.Size
-                        data = pe.get_data(data_rva, size)
 
                         file_name = self.get_resource_filename(resource_type_name, resource_name, resource_lang.struct.Id)
                         item = QTreeWidgetItem([file_name, resource_type_name, f"{size} bytes"])
                         type_item.addChild(item)
 
-                        # Store resource data
-                        self.resource_data[file_name] = data
+                        self.resources[file_name] = (data_rva, size, resource_type_name)
+
+    def read_resource(self, file_name):
+        # Sliced from a mapping of the file, so only the resources that are opened or extracted get copied
+        data_rva, size, _ = self.resources[file_name]
+        if self.file_map is None:
+            self.file_map = map_file(self.file_name)
+        try:
+            offset = self.pe.get_offset_from_rva(data_rva)
+        except pefile.PEFormatError:
+            offset = None
+        if offset is None or offset + size > len(self.file_map):
+            return self.pe.get_data(data_rva, size)  # Outside the raw section data; pefile pads it
+        return self.file_map[offset:offset + size]
+
+    def close_file(self):
+        if self.analysis_thread is not None:
+            self.analysis_thread.cancel()
+            self.analysis_thread.wait()
+        for thread in self.directory_threads.values():
+            thread.wait()
+        if self.file_map:
+            self.file_map.close()
+        self.file_map = None
 
     def get_resource_filename(self, type_name, resource_name, lang_id):
         extension = self.get_resource_extension(type_name)
@@ -163,12 +496,9 @@ class PEViewer(QWidget):
 
     def view_resource(self, item, column):
         file_name = item.text(0)
-        if file_name in self.resource_data:
-            data = self.resource_data[file_name]
-            temp_file_path = os.path.join(self.temp_dir, file_name)
-            with open(temp_file_path, 'wb') as f:
-                f.write(data)
-            self.main_viewer.openFileViewer(temp_file_path, self.get_mime_type(file_name))
+        if file_name in self.resources:
+            data = self.read_resource(file_name)
+            self.main_viewer.openFileViewer(VirtualFile(file_name, data), self.get_mime_type(file_name))
 
     def get_mime_type(self, file_name):
         import mimetypes
@@ -176,19 +506,20 @@ class PEViewer(QWidget):
         return mime_type or "application/octet-stream"
 
     def extract_all_resources(self):
-        if not self.resource_data:
+        thread = self.directory_threads.get(RESOURCE_DIRECTORY)
+        if thread is not None and thread.isRunning():
+            QMessageBox.information(self, "Resources Loading", "Resources are still being read, try again shortly.")
+            return
+        if not self.resources:
             QMessageBox.information(self, "No Resources", "No resources found to extract.")
             return
 
         dir_path = QFileDialog.getExistingDirectory(self, "Select Directory to Save Resources")
         if dir_path:
-            for file_name, data in self.resource_data.items():
+            for file_name in self.resources:
                 file_path = os.path.join(dir_path, file_name)
                 with open(file_path, 'wb') as f:
-                    f.write(data)
+                    f.write(self.read_resource(file_name))
             QMessageBox.information(self, "Resources Extracted", f"All resources have been extracted to {dir_path}")
             QDesktopServices.openUrl(QUrl.fromLocalFile(dir_path))
 
-    def __del__(self):
-        import shutil
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
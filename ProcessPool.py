@@ -0,0 +1,31 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# No Qt here or in the worker modules: spawned workers import only what the functions they run need
+
+_pool = None
+_lock = threading.Lock()
+
+def process_pool():
+    # One pool for the whole app. Workers are spawned rather than forked, since forking a process that runs
+    # Qt threads can deadlock the child, and a spawned worker's start-up is paid once instead of per task.
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+def submit(function, *args):
+    # A worker that died breaks the pool for good, so a fresh one is started in its place
+    global _pool
+    pool = process_pool()
+    try:
+        return pool.submit(function, *args)
+    except BrokenProcessPool:
+        with _lock:
+            if _pool is pool:
+                _pool = None
+        return process_pool().submit(function, *args)
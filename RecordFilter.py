@@ -0,0 +1,65 @@
+import re
+import json
+import mmap
+from array import array
+
+# Record filtering for NDJSONViewer, run in the shared process pool or in threads; kept free of Qt so
+# spawned workers stay light
+
+NEXT_RECORD = re.compile(rb'\n[ \t\r\n]*(?=[^ \t\r\n])')  # Ends just before the first byte of the next record
+KEY_STEP = re.compile(r'\[(\d+)\]|([^.\[\]]+)')
+MISSING = object()
+
+def parse_key_path(text):
+    # "user.roles[0]" requires the path to exist, "level=error" or 'user.id=42' also compares the value,
+    # which is read as JSON when it parses and as a plain string otherwise
+    path, has_value, expected = text.partition('=')
+    steps = [int(index) if index else key.strip() for index, key in KEY_STEP.findall(path.strip())]
+    if has_value:
+        try:
+            expected = json.loads(expected)
+        except ValueError:
+            expected = expected.strip()
+    return steps, bool(has_value), expected
+
+def follow_path(value, steps):
+    for step in steps:
+        if isinstance(step, int):
+            if not isinstance(value, list) or step >= len(value):
+                return MISSING
+        elif not isinstance(value, dict) or step not in value:
+            return MISSING
+        value = value[step]
+    return value
+
+def filter_records(source, start, end, first_record, key_path):
+    # Record numbers between start and end whose key path matches; source is a file name when run in a
+    # process, or the buffer itself when run in a thread
+    if isinstance(source, str):
+        with open(source, 'rb') as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                return filter_records(buffer, start, end, first_record, key_path)
+    steps, has_value, expected = parse_key_path(key_path)
+    # Records without the last key spelled out can't match, which rules most of them out without parsing;
+    # only used for keys JSON writers never escape
+    needle = None
+    last_key = next((step for step in reversed(steps) if isinstance(step, str)), None)
+    if last_key is not None and last_key.isascii() and json.dumps(last_key)[1:-1] == last_key:
+        needle = f'"{last_key}"'.encode()
+    matches = array('q')
+    number = first_record
+    position = start
+    while position < end:
+        match = NEXT_RECORD.search(source, position, end)
+        line_end = match.start() if match else end
+        line = bytes(source[position:line_end])
+        if needle is None or needle in line:
+            try:
+                value = follow_path(json.loads(line), steps)
+            except ValueError:
+                value = MISSING
+            if value is not MISSING and (not has_value or value == expected):
+                matches.append(number)
+        number += 1
+        position = match.end() if match else end
+    return matches
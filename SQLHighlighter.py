@@ -0,0 +1,22 @@
+from CompiledHighlighter import CompiledHighlighter
+
+class SQLHighlighter(CompiledHighlighter):
+    keywords = ["add", "all", "alter", "and", "any", "as", "asc", "begin", "between", "by", "case", "cascade",
+                "check", "column", "commit", "constraint", "create", "cross", "database", "declare", "default",
+                "delete", "desc", "distinct", "drop", "else", "end", "exec", "exists", "foreign", "from", "full",
+                "function", "grant", "group", "having", "if", "in", "index", "inner", "insert", "intersect", "into",
+                "is", "join", "key", "left", "like", "limit", "merge", "not", "null", "offset", "on", "or", "order",
+                "outer", "over", "partition", "primary", "procedure", "references", "replace", "return", "returns",
+                "revoke", "right", "rollback", "select", "set", "table", "then", "top", "transaction", "trigger",
+                "truncate", "union", "unique", "update", "using", "values", "view", "when", "where", "while", "with",
+                "int", "integer", "bigint", "smallint", "decimal", "numeric", "float", "real", "char", "varchar",
+                "nvarchar", "text", "date", "datetime", "timestamp", "boolean", "true", "false"]
+    ignore_case = True
+    token_rules = [
+        (r'\b[0-9]+(?:\.[0-9]+)?\b', 'number'),
+        (r'\b[A-Za-z_][A-Za-z0-9_]*(?=\s*\()', 'function'),
+        (r'[@:][A-Za-z_][A-Za-z0-9_]*', 'attribute'),  # Variables and bind parameters
+    ]
+    string_quotes = ["'", '"']
+    line_comment = '--'
+    multiline = [('/*', '*/', 'comment')]
@@ -0,0 +1,14 @@
+from CompiledHighlighter import CompiledHighlighter
+
+class ShellHighlighter(CompiledHighlighter):
+    keywords = ["if", "then", "else", "elif", "fi", "for", "while", "until", "do", "done", "case", "esac", "in",
+                "function", "select", "return", "exit", "local", "export", "readonly", "declare", "typeset", "unset",
+                "break", "continue", "shift", "source", "eval", "exec", "trap", "set", "echo", "printf", "read",
+                "cd", "test"]
+    token_rules = [
+        (r'\b[0-9]+\b', 'number'),
+        (r'\$\{[^}]*\}|\$[A-Za-z_][A-Za-z0-9_]*|\$[0-9@#?*!$\-]', 'attribute'),  # Variables
+        (r'\b[A-Za-z_][A-Za-z0-9_]*(?=\s*\(\s*\))', 'function'),
+    ]
+    string_quotes = ['"', "'"]
+    line_comment = r'(?<![^\s;|&(])#'  # Only at the start of a word, so $# and ${#x} aren't comments
@@ -0,0 +1,162 @@
+import re
+import threading
+from array import array
+from PyQt6.QtCore import QThread, pyqtSignal
+
+try:
+    import numpy
+except ImportError:
+    numpy = None  # No trigram index then; searches scan the whole buffer
+
+SEARCH_CHUNK = 4 * 1024 * 1024  # Bytes handed to the regex engine at once, cut at a line boundary
+BINARY_REGEX_OVERLAP = 64 * 1024  # Regex matches in binary data longer than this are missed across chunk edges
+MAX_MATCHES = 1000000  # Scanning stops here; the count is shown as a lower bound
+TRIGRAM_MIN_SIZE = 64 * 1024 * 1024  # Smaller buffers are scanned faster than an index could be built
+TRIGRAM_BLOCK = 1024 * 1024
+TRIGRAM_OVERLAP = 256  # Each block also covers the start of the next, so matches across the edge are found
+TRIGRAM_BITS = 16  # Each block keeps a 2**16 bit set of hashed trigrams (8 KiB per MiB of text)
+
+def compile_pattern(text, regex=False, case_sensitive=False):
+    # Matching runs on the raw UTF-8 bytes; raises re.error for bad regular expressions
+    pattern = text.encode('utf-8')
+    if not regex:
+        pattern = re.escape(pattern)
+    flags = re.MULTILINE if case_sensitive else re.MULTILINE | re.IGNORECASE
+    return re.compile(pattern, flags)
+
+def compile_hex_pattern(text):
+    # "4D 5A ?? 00": hex byte pairs, spaces optional, ?? matching any byte; returns the pattern and its length
+    # in bytes, and raises ValueError for anything else
+    digits = re.sub(r'\s+', '', text)
+    if not digits or len(digits) % 2 or not re.fullmatch(r'(?:[0-9A-Fa-f]{2}|\?\?)+', digits):
+        raise ValueError("expected pairs of hex digits or ??")
+    pairs = [digits[i:i + 2] for i in range(0, len(digits), 2)]
+    pattern = b''.join(b'.' if pair == '??' else re.escape(bytes.fromhex(pair)) for pair in pairs)
+    return re.compile(pattern, re.DOTALL), len(pairs)
+
+def trigram_hash(trigram):
+    value = (trigram[0] << 16) | (trigram[1] << 8) | trigram[2]
+    return ((value * 2654435761) & 0xFFFFFFFF) >> (32 - TRIGRAM_BITS)
+
+
+class TrigramIndex:
+    """Per-block bit sets of the trigrams a block contains, letting literal searches skip most of a huge file."""
+
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.size = len(buffer)
+        self.blocks = []  # Packed bit set per TRIGRAM_BLOCK; grows while the index is built
+
+    @staticmethod
+    def available():
+        return numpy is not None
+
+    def build(self, cancelled):
+        for start in range(len(self.blocks) * TRIGRAM_BLOCK, self.size, TRIGRAM_BLOCK):
+            if cancelled.is_set():
+                return
+            data = numpy.frombuffer(bytes(self.buffer[start:start + TRIGRAM_BLOCK + TRIGRAM_OVERLAP]), dtype=numpy.uint8)
+            # ASCII case is folded so the same index serves case-insensitive searches
+            data = data | (((data >= 65) & (data <= 90)).astype(numpy.uint8) << 5)
+            bits = numpy.zeros(1 << TRIGRAM_BITS, dtype=bool)
+            if len(data) >= 3:
+                values = (data[:-2].astype(numpy.uint32) << 16) | (data[1:-1].astype(numpy.uint32) << 8) | data[2:]
+                bits[(values * numpy.uint32(2654435761)) >> (32 - TRIGRAM_BITS)] = True
+            self.blocks.append(numpy.packbits(bits).tobytes())
+
+    def candidate_blocks(self, literal):
+        # Blocks that may contain literal; blocks not indexed yet always qualify
+        literal = literal[:TRIGRAM_OVERLAP].lower()
+        hashes = {trigram_hash(literal[i:i + 3]) for i in range(len(literal) - 2)}
+        block_count = (self.size + TRIGRAM_BLOCK - 1) // TRIGRAM_BLOCK
+        indexed = len(self.blocks)
+        for block in range(block_count):
+            if block >= indexed or all(self.blocks[block][h >> 3] & (0x80 >> (h & 7)) for h in hashes):
+                yield block
+
+
+class TrigramIndexThread(QThread):
+    def __init__(self, trigram_index, parent=None):
+        super().__init__(parent)
+        self.trigram_index = trigram_index
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def run(self):
+        self.trigram_index.build(self.cancelled)
+
+
+class SearchThread(QThread):
+    progress = pyqtSignal(int, int)  # Matches found so far, percent of the buffer scanned
+
+    def __init__(self, buffer, pattern, literal=None, trigram_index=None, overlap=None, parent=None):
+        # literal is the plain search text for non-regex searches, which enables the trigram index;
+        # overlap is set for binary data, where chunks can't be cut at newlines and instead overlap by that
+        # many bytes, the longest a match can be minus one
+        super().__init__(parent)
+        self.overlap = overlap
+        self.buffer = buffer
+        self.size = len(buffer)
+        self.pattern = pattern
+        self.literal = literal
+        self.trigram_index = trigram_index
+        self.cancelled = threading.Event()
+        self.starts = array('q')  # Byte offset of every match, in order
+        self.lengths = array('l')
+        self.truncated = False
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def run(self):
+        if self.trigram_index is not None and self.literal is not None and len(self.literal) >= 3:
+            self.scanBlocks()
+        else:
+            self.scanChunks()
+
+    def scanChunks(self):
+        start = 0
+        while start < self.size and not self.cancelled.is_set():
+            chunk = bytes(self.buffer[start:start + SEARCH_CHUNK])
+            advance = len(chunk)
+            if start + len(chunk) < self.size:
+                if self.overlap is not None:
+                    advance = max(1, len(chunk) - self.overlap)
+                else:
+                    # Cut at the last newline so no line, and so no match, is split between chunks
+                    cut = chunk.rfind(b'\n')
+                    if cut >= 0:
+                        chunk = chunk[:cut + 1]
+                        advance = len(chunk)
+            if not self.collect(chunk, start):
+                return
+            start += advance
+            self.progress.emit(len(self.starts), int(start * 100 / self.size))
+        self.progress.emit(len(self.starts), 100)
+
+    def scanBlocks(self):
+        reach = len(self.literal) - 1  # Matches starting in a block may end this far into the next
+        block_count = max(1, (self.size + TRIGRAM_BLOCK - 1) // TRIGRAM_BLOCK)
+        for block in self.trigram_index.candidate_blocks(self.literal):
+            if self.cancelled.is_set():
+                return
+            start = block * TRIGRAM_BLOCK
+            if not self.collect(bytes(self.buffer[start:start + TRIGRAM_BLOCK + reach]), start):
+                return
+            self.progress.emit(len(self.starts), int((block + 1) * 100 / block_count))
+        self.progress.emit(len(self.starts), 100)
+
+    def collect(self, chunk, start):
+        # Resume after the previous match, which may reach into this block, like a single scan would
+        position = max(0, self.starts[-1] + self.lengths[-1] - start) if self.starts else 0
+        for match in self.pattern.finditer(chunk, position):
+            if match.end() == match.start():
+                continue  # Empty regex matches can't be shown
+            self.starts.append(start + match.start())
+            self.lengths.append(match.end() - match.start())
+            if len(self.starts) >= MAX_MATCHES:
+                self.truncated = True
+                return False
+        return True
@@ -0,0 +1,354 @@
+import os
+import mmap
+import threading
+from array import array
+from bisect import bisect_left
+from PyQt6.QtWidgets import QAbstractScrollArea, QPlainTextEdit
+from PyQt6.QtGui import QPainter, QFont, QFontMetrics, QColor
+from PyQt6.QtCore import QThread, QTimer, QFileSystemWatcher, pyqtSignal
+from TextSearch import TrigramIndex, TrigramIndexThread, TRIGRAM_MIN_SIZE
+
+BLOCK_SIZE = 64 * 1024  # Newlines are counted per block; finding a line scans at most one block
+SHORT_LINE_BYTES = 1024  # Most lines fit in the first read
+MAX_LINE_BYTES = 64 * 1024  # Longer lines are cut off for display
+PROGRESS_BLOCKS = 256  # Blocks indexed between progress updates
+TAIL_START_BYTES = 256 * 1024  # How much of the existing file follow mode shows to begin with
+TAIL_READ_BYTES = 4 * 1024 * 1024  # Appended data read per pass, so a burst doesn't freeze the view
+MAX_SCROLLBACK_LINES = 100000  # Older lines are dropped while following
+POLL_INTERVAL_MS = 1000  # Fallback for file systems that don't report changes
+
+def map_file(file_name):
+    # Read-only mapping of the whole file; empty files can't be mapped
+    with open(file_name, 'rb') as file:
+        try:
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return b""
+
+def live_size(buffer):
+    # Touching pages of a mapping past the end of a file that has since been truncated (logrotate's
+    # copytruncate, say) raises SIGBUS, so reads from a mapping stay within the file's current size
+    if isinstance(buffer, mmap.mmap):
+        try:
+            return min(len(buffer), buffer.size())
+        except (OSError, ValueError):
+            return 0  # Closed
+    return len(buffer)
+
+
+class LineIndex:
+    """Line lookup over a byte buffer that keeps only a newline count per block, so memory stays constant per GB."""
+
+    def __init__(self, buffer, encoding='utf-8'):
+        self.buffer = buffer  # bytes, memoryview or mmap
+        self.size = len(buffer)
+        self.encoding = encoding
+        self.block_lines = array('q', [0])  # Newlines before block i; grows while the index is built
+        self.complete = False
+
+    def build(self, cancelled, progress=None):
+        lines = self.block_lines[-1]
+        for block, start in enumerate(range((len(self.block_lines) - 1) * BLOCK_SIZE, self.size, BLOCK_SIZE)):
+            if cancelled.is_set():
+                return
+            lines += self.read(start, start + BLOCK_SIZE).count(b'\n')
+            self.block_lines.append(lines)
+            if progress is not None and block % PROGRESS_BLOCKS == PROGRESS_BLOCKS - 1:
+                progress(self.line_count())
+        self.complete = True
+
+    def read(self, start, end):
+        return bytes(self.buffer[start:min(end, live_size(self.buffer))])
+
+    def line_count(self):
+        # Until the index is complete only the lines of fully indexed blocks are known
+        lines = self.block_lines[-1]
+        if self.complete and self.size and self.read(self.size - 1, self.size) != b'\n':
+            lines += 1  # Last line without a trailing newline
+        return lines
+
+    def line_offset(self, number):
+        # Byte offset of the start of line number, found via the block holding the preceding newline
+        if number <= 0:
+            return 0
+        block = bisect_left(self.block_lines, number) - 1
+        start = block * BLOCK_SIZE
+        chunk = self.read(start, start + BLOCK_SIZE)
+        position = -1
+        for _ in range(number - self.block_lines[block]):
+            position = chunk.find(b'\n', position + 1)
+        return start + position + 1
+
+    def line_at(self, offset):
+        # Line number holding the byte at offset, or None while that part is still being indexed
+        block = offset // BLOCK_SIZE
+        if block >= len(self.block_lines) - 1 and not self.complete:
+            return None
+        start = block * BLOCK_SIZE
+        return self.block_lines[block] + self.read(start, offset).count(b'\n')
+
+    def lines(self, first, count):
+        # Decodes only the requested lines
+        result = []
+        offset = self.line_offset(first)
+        for number in range(first, min(first + count, self.line_count())):
+            chunk = self.read(offset, offset + SHORT_LINE_BYTES)
+            end = chunk.find(b'\n')
+            if end < 0 and len(chunk) == SHORT_LINE_BYTES:
+                chunk = self.read(offset, offset + MAX_LINE_BYTES)
+                end = chunk.find(b'\n')
+            if end >= 0:
+                result.append(chunk[:end])
+                offset += end + 1
+            else:
+                result.append(chunk)  # Last line of the file, or a line cut off for display
+                offset = self.line_offset(number + 1)
+        return [line.rstrip(b'\r').decode(self.encoding, 'replace').expandtabs(4) for line in result]
+
+
+class LineIndexThread(QThread):
+    progress = pyqtSignal(int)  # Lines known so far
+
+    def __init__(self, line_index, parent=None):
+        super().__init__(parent)
+        self.line_index = line_index
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def run(self):
+        self.line_index.build(self.cancelled, self.progress.emit)
+        self.progress.emit(self.line_index.line_count())
+
+
+class LargeTextViewer(QAbstractScrollArea):
+    """Read-only text view that paints only the visible lines of a memory-mapped file."""
+
+    def __init__(self, buffer, parent=None):
+        super().__init__(parent)
+        self.line_index = LineIndex(buffer)
+        self.line_total = 0
+        self.max_width = 0  # Widest line painted so far, for the horizontal scroll range
+        self.highlight = None  # (byte offset, length) of the current search match
+        self.trigram_index = None
+        self.setFont(QFont("Consolas", 12))
+        self.viewport().setAutoFillBackground(True)
+
+        self.index_thread = LineIndexThread(self.line_index, self)
+        self.index_thread.progress.connect(self.setLineCount)
+        self.index_thread.start()
+
+    def stopIndexing(self):
+        self.index_thread.cancel()
+        self.index_thread.wait()
+        if self.trigram_index is not None:
+            self.trigram_thread.cancel()
+            self.trigram_thread.wait()
+
+    # Search target interface used by FindBar
+
+    @property
+    def buffer(self):
+        return self.line_index.buffer
+
+    def trigramIndex(self):
+        # Built on first use, and only where scanning the whole buffer per query would be slow
+        if self.trigram_index is None and self.line_index.size >= TRIGRAM_MIN_SIZE and TrigramIndex.available():
+            self.trigram_index = TrigramIndex(self.buffer)
+            self.trigram_thread = TrigramIndexThread(self.trigram_index, self)
+            self.trigram_thread.start()
+        return self.trigram_index
+
+    def showMatch(self, offset, length):
+        line = self.line_index.line_at(offset)
+        if line is None:
+            return False
+        self.highlight = (offset, length)
+        vertical = self.verticalScrollBar()
+        if not vertical.value() <= line < vertical.value() + self.visibleLines():
+            vertical.setValue(line - self.visibleLines() // 2)
+        # Bring the match into view horizontally as well
+        metrics = QFontMetrics(self.font())
+        line_start = self.line_index.line_offset(line)
+        left = metrics.horizontalAdvance(self.decodePrefix(line_start, offset))
+        right = left + metrics.horizontalAdvance(self.line_index.read(offset, offset + length).decode('utf-8', 'replace'))
+        horizontal = self.horizontalScrollBar()
+        if left < horizontal.value() or right > horizontal.value() + self.viewport().width():
+            self.max_width = max(self.max_width, right + 8)
+            self.updateScrollBars()
+            horizontal.setValue(left - self.viewport().width() // 3)
+        self.viewport().update()
+        return True
+
+    def clearMatch(self):
+        self.highlight = None
+        self.viewport().update()
+
+    def decodePrefix(self, line_start, offset):
+        return self.line_index.read(line_start, offset).decode('utf-8', 'replace').expandtabs(4)
+
+    def setFont(self, font):
+        super().setFont(font)
+        self.viewport().setFont(font)
+        self.max_width = 0
+        self.updateScrollBars()
+        self.viewport().update()
+
+    def lineHeight(self):
+        return QFontMetrics(self.font()).lineSpacing()
+
+    def visibleLines(self):
+        return max(1, self.viewport().height() // self.lineHeight())
+
+    def setLineCount(self, line_total):
+        self.line_total = line_total
+        self.updateScrollBars()
+        self.viewport().update()
+
+    def updateScrollBars(self):
+        visible = self.visibleLines()
+        vertical = self.verticalScrollBar()
+        vertical.setRange(0, max(0, self.line_total - visible))
+        vertical.setPageStep(visible)
+        vertical.setSingleStep(1)
+        horizontal = self.horizontalScrollBar()
+        horizontal.setRange(0, max(0, self.max_width - self.viewport().width()))
+        horizontal.setPageStep(self.viewport().width())
+        horizontal.setSingleStep(QFontMetrics(self.font()).averageCharWidth() * 4)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.updateScrollBars()
+
+    def scrollContentsBy(self, dx, dy):
+        self.viewport().update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.fillRect(event.rect(), self.palette().base())
+        metrics = QFontMetrics(self.font())
+        line_height = metrics.lineSpacing()
+        first = self.verticalScrollBar().value()
+        x = 4 - self.horizontalScrollBar().value()
+        y = metrics.ascent()
+        widest = self.max_width
+        highlight_line = self.line_index.line_at(self.highlight[0]) if self.highlight else None
+        painter.setPen(self.palette().text().color())
+        for number, line in enumerate(self.line_index.lines(first, self.visibleLines() + 1), first):
+            if number == highlight_line:
+                offset, length = self.highlight
+                line_start = self.line_index.line_offset(number)
+                left = metrics.horizontalAdvance(self.decodePrefix(line_start, offset))
+                width = metrics.horizontalAdvance(self.line_index.read(offset, offset + length).decode('utf-8', 'replace'))
+                painter.fillRect(x + left, y - metrics.ascent(), max(width, 2), line_height, QColor("#ffd54f"))
+            painter.drawText(x, y, line)
+            widest = max(widest, metrics.horizontalAdvance(line) + 8)
+            y += line_height
+        if widest != self.max_width:
+            self.max_width = widest
+            self.updateScrollBars()
+
+
+class TextTailViewer(QPlainTextEdit):
+    """Follows a growing file, reading only what was appended since the last read."""
+
+    def __init__(self, file_name, parent=None):
+        super().__init__(parent)
+        self.file_name = file_name
+        self.file = None
+        self.offset = 0
+        self.partial = b""  # Trailing bytes of an unfinished line
+        self.setReadOnly(True)
+        self.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
+        self.setMaximumBlockCount(MAX_SCROLLBACK_LINES)
+        self.setFont(QFont("Consolas", 12))
+
+        # The directory is watched too: a rotated file is replaced, and the watcher drops the old path
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.scheduleRead)
+        self.watcher.directoryChanged.connect(self.scheduleRead)
+        self.read_timer = QTimer(self)
+        self.read_timer.setSingleShot(True)
+        self.read_timer.setInterval(0)
+        self.read_timer.timeout.connect(self.readAppended)
+        self.poll_timer = QTimer(self)
+        self.poll_timer.setInterval(POLL_INTERVAL_MS)
+        self.poll_timer.timeout.connect(self.scheduleRead)
+
+        self.reopen(skip_to_tail=True)
+        self.setFollowing(True)
+
+    def setFollowing(self, following):
+        if following:
+            self.watcher.addPaths([self.file_name, os.path.dirname(os.path.abspath(self.file_name))])
+            self.poll_timer.start()
+            self.scheduleRead()
+        else:
+            if self.watcher.files() or self.watcher.directories():
+                self.watcher.removePaths(self.watcher.files() + self.watcher.directories())
+            self.poll_timer.stop()
+            self.read_timer.stop()
+
+    def stopFollowing(self):
+        self.setFollowing(False)
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def scheduleRead(self, *args):
+        self.read_timer.start()
+
+    def reopen(self, skip_to_tail=False):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        self.partial = b""
+        try:
+            self.file = open(self.file_name, 'rb')
+        except OSError:
+            return  # Rotated away and not recreated yet
+        self.offset = 0
+        if skip_to_tail:
+            size = os.fstat(self.file.fileno()).st_size
+            if size > TAIL_START_BYTES:
+                # Start at the first full line of the tail
+                self.file.seek(size - TAIL_START_BYTES)
+                self.file.readline()
+                self.offset = self.file.tell()
+
+    def readAppended(self):
+        try:
+            current = os.stat(self.file_name)
+        except OSError:
+            return  # Between rotation and recreation
+        if self.file_name not in self.watcher.files():
+            self.watcher.addPath(self.file_name)
+        if self.file is None or os.fstat(self.file.fileno()).st_ino != current.st_ino:
+            replaced = self.file is not None
+            self.reopen()
+            if replaced:
+                self.appendLines([b"--- file was replaced, following the new file ---"])
+        elif current.st_size < self.offset:
+            self.offset = 0
+            self.partial = b""
+            self.appendLines([b"--- file was truncated ---"])
+        if self.file is None or current.st_size == self.offset:
+            return
+        self.file.seek(self.offset)
+        data = self.file.read(min(current.st_size - self.offset, TAIL_READ_BYTES))
+        self.offset += len(data)
+        lines = (self.partial + data).split(b'\n')
+        self.partial = lines.pop()
+        self.appendLines(lines)
+        if self.offset < current.st_size:
+            self.scheduleRead()  # More to read; yield to the event loop first
+
+    def appendLines(self, lines):
+        if not lines:
+            return
+        scroll_bar = self.verticalScrollBar()
+        at_bottom = scroll_bar.value() == scroll_bar.maximum()
+        self.appendPlainText("\n".join(line.rstrip(b'\r').decode('utf-8', 'replace') for line in lines))
+        if at_bottom:
+            scroll_bar.setValue(scroll_bar.maximum())
@@ -0,0 +1,110 @@
+import io
+import locale
+import os
+import mmap
+import shutil
+import hashlib
+import tempfile
+import weakref
+from DiskCache import file_key
+
+SPILL_THRESHOLD = 64 * 1024 * 1024  # Members above this size are kept on disk instead of in memory
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError:
+        return False
+    return True
+
+class VirtualFile:
+    """A file handed to a viewer straight from memory, e.g. an archive member, spilling to disk only when large."""
+
+    def __init__(self, name, data=None, path=None, key=None):
+        self.name = name  # Original member name, used for the title, extension and mime type
+        self.data = data
+        self.path = path  # Temporary file owned by this object, if any
+        self.key = key  # Stable disk cache key, e.g. derived from the containing archive
+        self.mapped = None
+
+    @classmethod
+    def from_stream(cls, name, stream, size, key=None):
+        if size <= SPILL_THRESHOLD:
+            return cls(name, stream.read(), key=key)
+        fd, path = tempfile.mkstemp(suffix=os.path.splitext(name)[1])
+        with os.fdopen(fd, 'wb') as file:
+            shutil.copyfileobj(stream, file)
+        return cls(name, path=path, key=key)
+
+    @classmethod
+    def from_extracted(cls, name, extracted_path, key=None):
+        # Take ownership of a file some extractor already wrote, without copying it
+        fd, path = tempfile.mkstemp(suffix=os.path.splitext(name)[1])
+        os.close(fd)
+        shutil.move(extracted_path, path)
+        return cls(name, path=path, key=key)
+
+    @property
+    def size(self):
+        return len(self.data) if self.data is not None else os.path.getsize(self.path)
+
+    def in_memory(self):
+        return self.data is not None
+
+    def read_bytes(self):
+        if self.data is not None:
+            return self.data
+        with open(self.path, 'rb') as file:
+            return file.read()
+
+    def read_text(self, encoding='utf-8'):
+        # encoding=None means the system default, like open() does
+        return bytes(self.read_bytes()).decode(encoding or locale.getpreferredencoding(False))
+
+    def getbuffer(self):
+        # Zero-copy view of the contents; spilled files are memory-mapped rather than read
+        if self.data is not None:
+            return memoryview(self.data)
+        if self.mapped is None:
+            with open(self.path, 'rb') as file:
+                self.mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        return memoryview(self.mapped)
+
+    def open(self):
+        if self.data is not None:
+            return io.BytesIO(self.data)
+        return open(self.path, 'rb')
+
+    def local_path(self):
+        # For consumers that can only take a path; the file is written once and removed on close()
+        if self.path is None:
+            fd, self.path = tempfile.mkstemp(suffix=os.path.splitext(self.name)[1])
+            with os.fdopen(fd, 'wb') as file:
+                file.write(self.data)
+        return self.path
+
+    def cache_key(self):
+        if self.key is not None:
+            return self.key
+        if self.data is not None:
+            return hashlib.blake2b(self.data, digest_size=20).hexdigest()
+        return file_key(self.path)
+
+    def close(self):
+        exported = None
+        if isinstance(self.mapped, mmap.mmap):
+            try:
+                self.mapped.close()
+            except BufferError:
+                exported = self.mapped  # A viewer still holds a view of it
+        self.mapped = None
+        self.data = None
+        if self.path is None or remove_file(self.path):
+            self.path = None
+        elif exported is not None:
+            # Windows can't delete a mapped file; the mapping is closed when the last view of it is released,
+            # and the file goes right after
+            weakref.finalize(exported, remove_file, self.path)
+            self.path = None
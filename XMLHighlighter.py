@@ -0,0 +1,11 @@
+from CompiledHighlighter import CompiledHighlighter
+
+class XMLHighlighter(CompiledHighlighter):
+    # Quotes only delimit strings inside tags, so apostrophes in text content are left alone
+    token_rules = [
+        (r'</?[A-Za-z_][\w:.\-]*|/?>|<\?[\w:.\-]*|\?>|<!DOCTYPE\b', 'tag'),
+        (r'\b[A-Za-z_][\w:.\-]*(?=\s*=\s*["\'])', 'attribute'),
+        (r'(?<==)\s*"[^"]*"|(?<==)\s*\'[^\']*\'', 'string'),
+        (r'&[#\w]+;', 'keyword'),  # Entities
+    ]
+    multiline = [('<!--', '-->', 'comment'), ('<![CDATA[', ']]>', 'string')]
@@ -0,0 +1,15 @@
+from CompiledHighlighter import CompiledHighlighter
+
+class YAMLHighlighter(CompiledHighlighter):
+    keywords = ["true", "false", "null", "yes", "no", "on", "off", "True", "False", "Null", "TRUE", "FALSE",
+                "NULL", "Yes", "No", "On", "Off"]
+    token_rules = [
+        (r'\b-?[0-9]+(?:\.[0-9]+)?\b', 'number'),
+        (r'[^\s:#\'"\-][^:#]*?(?=\s*:(?:\s|$))', 'attribute'),  # Mapping keys
+        (r'[&*][\w\-]+', 'function'),  # Anchors and aliases
+        (r'!{1,2}[\w/:\-.]*', 'tag'),
+        (r'^(?:---|\.\.\.)(?=\s|$)', 'keyword'),  # Document markers
+        (r'(?<=[:\-\[,{] )\'(?:[^\']|\'\')*\'', 'string'),  # Single-quoted scalars, where apostrophes can't be words
+    ]
+    string_quotes = ['"']
+    line_comment = r'(?<!\S)#'  # A # inside a plain scalar is not a comment
@@ -6,29 +6,41 @@ import mimetypes
 import shutil
 import tempfile
 import re
-from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QGridLayout, QMessageBox, QTreeWidget, QTreeWidgetItem,
-                             QPushButton, QFileDialog, QLabel, QTextEdit, QVBoxLayout, QToolBar, QScrollArea, QHBoxLayout)
-from PyQt6.QtGui import QIcon, QPixmap, QFont, QImage, QAction, QMovie
-from PyQt6.QtCore import Qt, QUrl
+import json
+from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QGridLayout, QMessageBox, QTreeView,
+                             QPushButton, QFileDialog, QLabel, QTextEdit, QVBoxLayout, QToolBar, QScrollArea, QHBoxLayout,
+                             QProgressDialog, QLineEdit, QSpinBox)
+from PyQt6.QtGui import QIcon, QPixmap, QFont, QAction, QMovie, QKeySequence, QIntValidator
+from PyQt6.QtCore import Qt, QUrl, QBuffer, QIODevice
 from PyQt6.QtWebEngineWidgets import QWebEngineView
-import fitz  # PyMuPDF for PDF rendering
 import py7zr
 import subprocess
-import tarfile
 
 cwd=os.path.dirname(os.path.abspath(sys.argv[0]))
 unrar_dll_path = fr"{cwd}\utils\UnRAR64.dll"
 os.environ['UNRAR_LIB_PATH'] = unrar_dll_path
 
 from unrar import rarfile
-import patoolib
-from JavaHighlighter import JavaHighlighter
-from PythonHighlighter import PythonHighlighter
-from KotlinHighlighter import KotlinHighlighter
+from LanguageRegistry import language_for, sniff_file, get_lexer
+from LazyHighlighter import LazyHighlighter
 from JSONViewer import JSONViewer
+from NDJSONViewer import NDJSONViewer
+from HexViewer import HexViewer, parse_offset
 from PEViewer import PEViewer
+from PDFViewer import PDFViewer
+from TextViewer import LargeTextViewer, TextTailViewer, map_file
+from FindBar import FindBar, TextEditSearchTarget
+from DiskCache import get_cache, file_key
+from ArchiveModel import ArchiveModel
+from ArchiveIndex import ArchiveIndex
+from ArchiveBackend import open_backend, EXTENSION_KINDS
+from ExtractionEngine import ExtractionThread
+from VirtualFile import VirtualFile, SPILL_THRESHOLD
 from FileTypeChoiceDialog import FileTypeChoiceDialog
 
+MAX_SET_HTML_SIZE = 1024 * 1024  # QWebEngineView.setHtml refuses content over 2 MB once encoded
+LARGE_TEXT_SIZE = 8 * 1024 * 1024  # Text files above this are memory-mapped and painted line by line
+
 def is_archive(file_name):
     try:
         # Check for ZIP
@@ -140,6 +152,7 @@ class MainWindow(QMainWindow):
             ("JAVA", "icons/java.png", lambda: self.openFile("Java Files (*.java)", "None",["java"])),
             ("KT", "icons/kt.png", lambda: self.openFile("Kotlin Files (*.kt)", "None",["kt"])),
             ("JSON", "icons/json.png", lambda: self.openFile("JSON Files (*.json)", "application/json",["json"])),
+            ("JSONL", "icons/json.png", lambda: self.openFile("JSON Lines Files (*.jsonl *.ndjson)", "application/x-ndjson",["jsonl", "ndjson"])),
             ("CLASS", "icons/class.png", lambda: self.openFile("Class Files (*.class)", "None",["class"])),
             ("HTML", "icons/html.png", lambda: self.openFile("HTML Files (*.html)", "text/html",["html"])),
             ("HTM", "icons/htm.png", lambda: self.openFile("HTM Files (*.htm)", "text/html",["htm"])),
@@ -167,8 +180,12 @@ class MainWindow(QMainWindow):
             file_type, _ = mimetypes.guess_type(file_name)
             if file_type:
                 self.openFileViewer(file_name, file_type)
+            elif sniff_file(file_name):
+                # Scripts without an extension, recognized by their shebang
+                self.openFileViewer(file_name, 'text/plain')
             else:
-                QMessageBox.warning(self, "File Type Error", "Unable to determine file type.")
+                # .dat, .raw and other unrecognized data go to the hex viewer
+                self.openFileViewer(file_name, 'application/octet-stream')
 
     def openFile(self, file_filter, expected_mime_type, extension):
         file_name, _ = QFileDialog.getOpenFileName(self, "Open File", "", file_filter)
@@ -208,24 +225,40 @@ class MainWindow(QMainWindow):
 class FileViewer(QMainWindow):
     def __init__(self, file_name, file_type, main_window=None):
         super().__init__()
-        self.file_name = file_name
+        # file_name is a path, or a VirtualFile for content that only exists in memory (e.g. archive members)
+        if isinstance(file_name, VirtualFile):
+            self.virtual_file = file_name
+            self.file_name = file_name.name
+        else:
+            self.virtual_file = None
+            self.file_name = file_name
         self.file_type = str(file_type)
         self.zoom_level = 1.0
         self.main_window = main_window
-        self.temp_files = []  # Store temporary file objects
         self.temp_viewers = []  # Store viewers for temporary files
-        self.archive_handlers = {
-            '.zip': self.handle_zip,
-            '.jar': self.handle_zip,  # JAR files are essentially ZIP files
-            '.rar': self.handle_rar,
-            '.7z': self.handle_7z,
-            '.tar': self.handle_tar
-        }
         self.initUI()
     def openFileViewer(self, file_name, file_type):
         viewer = FileViewer(file_name, file_type, self.main_window)
         viewer.show()
         self.main_window.viewers.append(viewer)  # Keep a reference to the viewer
+    def readBytes(self):
+        if self.virtual_file is not None:
+            return self.virtual_file.read_bytes()
+        with open(self.file_name, 'rb') as file:
+            return file.read()
+
+    def readText(self, encoding='utf-8'):
+        if self.virtual_file is not None:
+            return self.virtual_file.read_text(encoding)
+        with open(self.file_name, 'r', encoding=encoding) as file:
+            return file.read()
+
+    def localPath(self):
+        # Only for consumers that need a real file; a VirtualFile is written out once and removed on close
+        if self.virtual_file is not None:
+            return self.virtual_file.local_path()
+        return self.file_name
+
     def initUI(self):
         self.setWindowTitle(f'Viewing: {os.path.basename(self.file_name)}')
         self.setGeometry(200, 200, 800, 600)
@@ -241,6 +274,18 @@ class FileViewer(QMainWindow):
         self.zoom_out_action.triggered.connect(self.zoomOut)
         self.toolbar.addAction(self.zoom_out_action)
 
+        self.find_action = QAction('Find', self)
+        self.find_action.setShortcut(QKeySequence.StandardKey.Find)
+        self.find_action.triggered.connect(self.openFindBar)
+        self.toolbar.addAction(self.find_action)
+
+        if self.file_type == 'text/plain' and self.virtual_file is None:
+            # Only real files can grow; archive members never change
+            self.follow_action = QAction('Follow', self)
+            self.follow_action.setCheckable(True)
+            self.follow_action.toggled.connect(self.toggleFollow)
+            self.toolbar.addAction(self.follow_action)
+
         self.scroll_area = QScrollArea(self)
         self.scroll_area.setWidgetResizable(True)
         self.setCentralWidget(self.scroll_area)
@@ -255,8 +300,10 @@ class FileViewer(QMainWindow):
                 self.displayGIF()
             else:
                 self.displayImage()
-        elif file_extension in ['.py', '.java', '.class', ".kt"]:    
-            self.displayCodeWithHighlighting(file_extension)      
+        elif file_extension == '.class' or language_for(self.file_name):
+            self.displayCodeWithHighlighting(file_extension)
+        elif file_extension in ['.jsonl', '.ndjson']:
+            self.displayNDJSON()
         elif self.file_type in ['text/plain', 'text/markdown']:
             self.displayText()
         elif self.file_type == 'text/html':
@@ -272,31 +319,87 @@ class FileViewer(QMainWindow):
         elif file_extension == '.json':
             self.displayJSON()
         else:
-            self.displayUnsupported()
+            # .dat, .bin, .iso, .raw and anything else without a dedicated viewer
+            self.displayHex()
     def displayJSON(self):
         try:
-            with open(self.file_name, 'r', encoding='utf-8') as file:
-                json_data = file.read()
-            
-            json_viewer = JSONViewer(json_data)
+            # Mapped rather than read, so only the parts of the document that are expanded get touched
+            if self.virtual_file is not None:
+                json_data = self.virtual_file.getbuffer()
+            else:
+                json_data = self.text_map = map_file(self.file_name)
+
+            json_viewer = self.json_viewer = JSONViewer(json_data)
             self.setCentralWidget(json_viewer)
             
-            # Add expand/collapse buttons
+            # Add expand/collapse buttons; expanding is bounded by depth, since the document is read lazily
             toolbar = QToolBar()
             self.addToolBar(toolbar)
             
-            expand_action = QAction("Expand All", self)
-            expand_action.triggered.connect(json_viewer.expandAll)
+            depth_box = QSpinBox()
+            depth_box.setRange(1, 20)
+            depth_box.setValue(2)
+            depth_box.setToolTip("Depth to expand to")
+            toolbar.addWidget(depth_box)
+
+            expand_action = QAction("Expand", self)
+            expand_action.triggered.connect(lambda: json_viewer.expandTo(depth_box.value()))
             toolbar.addAction(expand_action)
             
             collapse_action = QAction("Collapse All", self)
             collapse_action.triggered.connect(json_viewer.collapseAll)
             toolbar.addAction(collapse_action)
 
+            toolbar.addSeparator()
+            query_edit = QLineEdit()
+            query_edit.setPlaceholderText("Query, e.g. $..price or .items[?(@.id > 3)].name")
+            query_edit.returnPressed.connect(lambda: json_viewer.runQuery(query_edit.text()))
+            toolbar.addWidget(query_edit)
+
+            previous_action = QAction("Previous", self)
+            previous_action.triggered.connect(json_viewer.previousMatch)
+            toolbar.addAction(previous_action)
+
+            next_action = QAction("Next", self)
+            next_action.triggered.connect(json_viewer.nextMatch)
+            toolbar.addAction(next_action)
+
+            status_label = QLabel()
+            json_viewer.status.connect(status_label.setText)
+            toolbar.addWidget(status_label)
+
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Failed to load JSON file: {str(e)}")
+    def displayNDJSON(self):
+        if self.virtual_file is not None:
+            self.ndjson_viewer = NDJSONViewer(self.virtual_file.getbuffer())
+        else:
+            self.text_map = map_file(self.file_name)
+            self.ndjson_viewer = NDJSONViewer(self.text_map, self.file_name)
+        self.setCentralWidget(self.ndjson_viewer)
+
+        toolbar = QToolBar()
+        self.addToolBar(toolbar)
+
+        record_edit = QLineEdit()
+        record_edit.setPlaceholderText("Go to record")
+        record_edit.setValidator(QIntValidator(0, 2 ** 31 - 1, record_edit))
+        record_edit.setMaximumWidth(120)
+        record_edit.returnPressed.connect(
+            lambda: record_edit.text() and self.ndjson_viewer.goToRecord(int(record_edit.text())))
+        toolbar.addWidget(record_edit)
+
+        filter_edit = QLineEdit()
+        filter_edit.setPlaceholderText("Filter by key path, e.g. user.id or level=error")
+        filter_edit.returnPressed.connect(lambda: self.ndjson_viewer.setFilter(filter_edit.text()))
+        toolbar.addWidget(filter_edit)
+
+        status_label = QLabel()
+        self.ndjson_viewer.status.connect(status_label.setText)
+        toolbar.addWidget(status_label)
+
     def displayPE(self):
-        archive_type = is_archive(self.file_name)
+        archive_type = is_archive(self.localPath())
         
         if archive_type:
             dialog = FileTypeChoiceDialog(self)
@@ -304,32 +407,35 @@ class FileViewer(QMainWindow):
             
             if choice == "PE":
                 try:
-                    pe_viewer = PEViewer(self.file_name, self)
-                    self.setCentralWidget(pe_viewer)
+                    self.pe_viewer = PEViewer(self.localPath(), self)
+                    self.setCentralWidget(self.pe_viewer)
                 except Exception as e:
                     QMessageBox.warning(self, "Error", f"Failed to load PE file: {str(e)}")
             else:
                 self.displayCompressedFile(archive_type)
         else:
             try:
-                pe_viewer = PEViewer(self.file_name, self)
-                self.setCentralWidget(pe_viewer)
+                self.pe_viewer = PEViewer(self.localPath(), self)
+                self.setCentralWidget(self.pe_viewer)
             except Exception as e:
                 QMessageBox.warning(self, "Error", f"Failed to load file: {str(e)}")
     def displayCodeWithHighlighting(self, file_extension):
         if file_extension == '.class':
-            content = decompile_class_file(self, self.file_name)
+            content = decompile_class_file(self, self.localPath())
             if content is None:
                 content = "Failed to decompile .class file"
-            file_extension = '.java'  # Use Java highlighter for decompiled .class files
+            language = 'java'  # Use Java highlighter for decompiled .class files
         else:
+            if self.fileSize() > LARGE_TEXT_SIZE:
+                # A highlighted QTextEdit needs the whole file in memory; huge dumps are shown unhighlighted
+                self.displayLargeText()
+                return
+            language = language_for(self.file_name)
             try:
-                with open(self.file_name, 'r', encoding='utf-8') as file:
-                    content = file.read()
+                content = self.readText()
             except UnicodeDecodeError:
                 # If UTF-8 fails, try with system default encoding
-                with open(self.file_name, 'r') as file:
-                    content = file.read()
+                content = self.readText(None)
 
         self.text_edit = QTextEdit(self)
         self.text_edit.setPlainText(content)
@@ -337,21 +443,16 @@ class FileViewer(QMainWindow):
         font = QFont("Consolas", 12)
         self.text_edit.setFont(font)
 
-        if file_extension == '.py':
-            self.highlighter = PythonHighlighter(self.text_edit.document())
-        elif file_extension == '.java':
-            self.highlighter = JavaHighlighter(self.text_edit.document())
-        elif file_extension == '.kt':
-            self.highlighter = KotlinHighlighter(self.text_edit.document())
+        # Highlighting follows the viewport instead of running over the whole document up front
+        self.highlighter = LazyHighlighter(self.text_edit, get_lexer(language))
         self.layout.addWidget(self.text_edit)
 
     def displayCompressedFile(self, archive_type = None):
         self.zip_widget = QWidget()
         layout = QVBoxLayout(self.zip_widget)
 
-        self.tree = QTreeWidget()
-        self.tree.setHeaderLabels(["File Name", "Size"])
-        self.tree.setColumnWidth(0, 300)
+        self.tree = QTreeView()
+        self.tree.setUniformRowHeights(True)
         layout.addWidget(self.tree)
 
         button_layout = QHBoxLayout()
@@ -368,34 +469,84 @@ class FileViewer(QMainWindow):
 
         self.layout.addWidget(self.zip_widget)
 
-        ext = os.path.splitext(self.file_name)[1].lower()
-        handler = getattr(self, f'handle_{archive_type}', None)
-        if handler:
-            handler()
-        else:
-            #QMessageBox.warning(self, "Error", f"Unsupported archive type: {archive_type}")
-            handler = self.archive_handlers.get(ext, self.handle_generic)
-            handler()
-
-        self.tree.itemDoubleClicked.connect(self.viewFileFromArchive)
-
-    def handle_zip(self):
-        with zipfile.ZipFile(self.file_name, 'r') as zip_ref:
-            root = {}
-            for file_info in zip_ref.infolist():
-                parts = file_info.filename.split('/')
-                parent = root
-                for part in parts[:-1]:
-                    if part not in parent:
-                        parent[part] = {}
-                    parent = parent[part]
-                if parts[-1]:
-                    parent[parts[-1]] = {'__file_info__': {
-                        'filename': file_info.filename,
-                        'file_size': file_info.file_size,
-                        'is_dir': file_info.is_dir()
-                    }}
-            self.addItems(self.tree.invisibleRootItem(), root)
+        self.nested_backends = {}  # NESTED entry -> backend, opened the first time a member is read
+        self.nested_files = []  # Nested archives that had to be decompressed to be read
+        try:
+            self.archive_backend = open_backend(self.localPath(), archive_type)
+            self.loadArchiveListing()
+        except Exception as e:
+            QMessageBox.warning(self, "Error", f"Failed to read archive: {str(e)}")
+
+        self.tree.doubleClicked.connect(self.archiveItemActivated)
+
+    def loadArchiveListing(self):
+        entries = self.archiveListing(self.cacheKey(), f"archive-listing-{self.archive_backend.kind}",
+                                      self.archive_backend.list)
+        self.archive_index = ArchiveIndex.from_entries(entries)
+        self.archive_model = ArchiveModel(self.archive_index, self.formatSize, self.loadNestedArchive, self)
+        self.tree.setModel(self.archive_model)
+        self.tree.setColumnWidth(0, 300)
+
+    def archiveListing(self, key, kind, list_entries):
+        # Listings are cached on disk as (filename, file_size, is_dir, offset) rows, so reopening an archive skips the scan
+        cache = get_cache()
+        data = cache.get(key, kind) if key else None
+        if data is not None:
+            return json.loads(data)
+        entries = list_entries()
+        if key:
+            cache.put(key, kind, json.dumps(entries).encode('utf-8'))
+        return entries
+
+    def loadNestedArchive(self, entry):
+        # Expanding an archive member lists its contents in place; with a cached listing the member isn't even opened
+        try:
+            entries = self.archiveListing(self.memberKey(entry), "archive-listing-nested",
+                                          lambda: self.nestedBackend(entry).list())
+            self.archive_index.graft(entry, entries)
+        except Exception as e:
+            self.archive_index.mark_loaded(entry)
+            QMessageBox.warning(self, "Error", f"Failed to read nested archive: {str(e)}")
+
+    def nestedBackend(self, entry):
+        backend = self.nested_backends.get(entry)
+        if backend is not None:
+            return backend
+        parent_backend, filename = self.backendFor(entry)
+        name = self.archive_index.names[entry]
+        kind = EXTENSION_KINDS.get(os.path.splitext(name)[1].lower())
+        # Stored members are read through a window onto the parent archive, everything else is decompressed once
+        opener = parent_backend.member_opener(filename)
+        backend = open_backend(name, kind, opener) if opener is not None else None
+        if backend is None:
+            virtual_file = self.memberFile(entry)
+            self.nested_files.append(virtual_file)
+            if virtual_file.in_memory():
+                backend = open_backend(name, kind, virtual_file.open)
+            if backend is None:
+                backend = open_backend(virtual_file.local_path(), kind)
+        self.nested_backends[entry] = backend
+        return backend
+
+    def backendFor(self, entry):
+        # The backend of the archive that directly contains entry, and the member name inside it
+        container = self.archive_index.container(entry)
+        backend = self.nestedBackend(container) if container else self.archive_backend
+        return backend, self.archive_index.member_path(entry)
+
+    def memberKey(self, entry):
+        return f"{self.cacheKey()}/{self.archive_index.path(entry)}" if self.cacheKey() else None
+
+    def cacheKey(self):
+        if not hasattr(self, 'cache_key'):
+            try:
+                if self.virtual_file is not None:
+                    self.cache_key = self.virtual_file.cache_key()
+                else:
+                    self.cache_key = file_key(self.file_name)
+            except OSError:
+                self.cache_key = None
+        return self.cache_key
 
     def displayDecompiledClass(self, decompiled_code):
         self.text_edit = QTextEdit(self)
@@ -405,301 +556,122 @@ class FileViewer(QMainWindow):
         self.text_edit.setFont(font)
         self.layout.addWidget(self.text_edit)
 
-    def handle_rar(self):
-        try:
-            with rarfile.RarFile(self.file_name, 'r') as rar_ref:
-                root = {}
-                for file_info in rar_ref.infolist():
-
-                    parts = file_info.filename.split('/')
-                    parent = root
-                    for i, part in enumerate(parts):
-                        if i == len(parts) - 1:  # Last part (file)
-                            parent[part] = {'__file_info__': {
-                                'filename': file_info.filename,
-                                'file_size': file_info.file_size,
-                                'is_dir': False
-                            }}
-                        else:  # Directory
-                            if part not in parent:
-                                parent[part] = {}
-                            parent = parent[part]
-                self.addItems(self.tree.invisibleRootItem(), root)
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Failed to read archive: {str(e)}")
-
-    def extract_from_rar(self, file_info):
-        try:
-            temp_dir = tempfile.mkdtemp()
-            with rarfile.RarFile(self.file_name, 'r') as rar_ref:
-                rar_ref.extract(file_info['filename'], temp_dir)
-            extracted_path = os.path.join(temp_dir, file_info['filename'])
-            if os.path.exists(extracted_path):
-                with open(extracted_path, 'rb') as file:
-                    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file_info['filename'])[1])
-                    temp_file.write(file.read())
-                    temp_file.flush()
-                    self.temp_files.append(temp_file)  # Keep the file object in memory
-                shutil.rmtree(temp_dir)
-                return temp_file
-        except rarfile.Error as e:
-            QMessageBox.warning(self, "Error", f"Failed to extract file from RAR archive: {str(e)}")
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Unexpected error while extracting file: {str(e)}")
-        finally:
-            if 'temp_dir' in locals():
-                shutil.rmtree(temp_dir, ignore_errors=True)
-        return None
-    def handle_7z(self):
-        with py7zr.SevenZipFile(self.file_name, 'r') as sz_ref:
-            root = {}
-            for file_info in sz_ref.list():
-                parts = file_info.filename.split('/')
-                parent = root
-                for part in parts[:-1]:
-                    if part not in parent:
-                        parent[part] = {}
-                    parent = parent[part]
-                if parts[-1]:
-                    parent[parts[-1]] = {'__file_info__': {
-                        'filename': file_info.filename,
-                        'file_size': file_info.uncompressed,
-                        'is_dir': file_info.is_directory
-                    }}
-            self.addItems(self.tree.invisibleRootItem(), root)
-    def handle_tar(self):
-        with tarfile.open(self.file_name, 'r:*') as tar_ref:
-            root = {}
-            for file_info in tar_ref.getmembers():
-                parts = file_info.name.split('/')
-                parent = root
-                for i, part in enumerate(parts):
-                    if i == len(parts) - 1:  # Last part
-                        if file_info.isdir():
-                            if part not in parent:
-                                parent[part] = {}
-                        else:
-                            parent[part] = {'__file_info__': {
-                                'filename': file_info.name,
-                                'file_size': file_info.size,
-                                'is_dir': False
-                            }}
-                    else:  # Directory
-                        if part not in parent:
-                            parent[part] = {}
-                        parent = parent[part]
-            self.addItems(self.tree.invisibleRootItem(), root)
-    def handle_generic(self):
-        try:
-            file_list = patoolib.list_archive(self.file_name)
-            root = {}
-            for file_path in file_list:
-                parts = file_path.split('/')
-                parent = root
-                for part in parts[:-1]:
-                    if part not in parent:
-                        parent[part] = {}
-                    parent = parent[part]
-                if parts[-1]:
-                    parent[parts[-1]] = {'__file_info__': {'filename': file_path, 'file_size': 0}}
-
-            self.addItems(self.tree.invisibleRootItem(), root)
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Failed to read archive: {str(e)}")
-
-    def addItems(self, parent, elements):
-        folders = []
-        files = []
-
-        for key, value in elements.items():
-            if '__file_info__' in value:
-                files.append((key, value))
-            else:
-                folders.append((key, value))
-
-        folders.sort(key=lambda x: x[0].lower())
-        files.sort(key=lambda x: x[0].lower())
-
-        for key, value in folders + files:
-            item = QTreeWidgetItem(parent)
-            item.setText(0, key)
-            if '__file_info__' in value:
-                file_info = value['__file_info__']
-                size_in_bytes = file_info['file_size']
-                formatted_size = self.formatSize(size_in_bytes)
-                item.setText(1, formatted_size if not file_info['is_dir'] else "")
-                item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
-                item.setCheckState(0, Qt.CheckState.Unchecked)
-                item.setData(0, Qt.ItemDataRole.UserRole, file_info)
-                icon_path = f"icons/{'folder' if file_info['is_dir'] else os.path.splitext(key)[1][1:]}.png"
-                if os.path.exists(icon_path):
-                    item.setIcon(0, QIcon(icon_path))
-            else:
-                self.addItems(item, value)
-
-
     def viewSelected(self):
-        selected_items = self.tree.selectedItems()
-        for item in selected_items:
-            self.viewFileFromArchive(item, 0)
-
-    def viewFileFromArchive(self, item, column):
-        file_info = item.data(0, Qt.ItemDataRole.UserRole)
+        if self.tree.selectionModel() is None:
+            return  # The archive could not be read
+        for index in self.tree.selectionModel().selectedRows(0):
+            self.viewFileFromArchive(index)
+
+    def archiveItemActivated(self, index):
+        # Double-clicking a nested archive expands it in the tree instead of opening another window
+        if index.isValid() and self.archive_index.is_nested(self.archive_model.entry(index)):
+            return
+        self.viewFileFromArchive(index)
+
+    def viewFileFromArchive(self, index):
+        file_info = index.siblingAtColumn(0).data(Qt.ItemDataRole.UserRole)
         if file_info and not file_info['is_dir']:
-            ext = os.path.splitext(self.file_name)[1].lower()
-            temp_file = self.extractFileFromArchive(ext, file_info)
-            if temp_file:
-                viewer = FileViewer(temp_file.name, mimetypes.guess_type(file_info['filename'])[0], self.main_window)
+            virtual_file = self.extractFileFromArchive(file_info)
+            if virtual_file:
+                viewer = FileViewer(virtual_file, mimetypes.guess_type(file_info['filename'])[0], self.main_window)
                 viewer.show()
                 self.temp_viewers.append(viewer)  # Keep a reference to the viewer
 
-    def extractFileFromArchive(self, ext, file_info):
-        if ext == '.zip' or ext == '.jar':
-            return self.extract_from_zip(file_info)
-        elif ext == '.rar':
-            return self.extract_from_rar(file_info)
-        elif ext == '.7z':
-            return self.extract_from_7z(file_info)
-        elif ext == '.tar':
-            return self.extract_from_tar(file_info)
-        else:
-            return self.extract_generic(file_info)
-    def extract_from_zip(self, file_info):
-        with zipfile.ZipFile(self.file_name, 'r') as zip_ref:
-            with zip_ref.open(file_info['filename']) as file:
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file_info['filename'])[1])
-                temp_file.write(file.read())
-                temp_file.flush()
-                self.temp_files.append(temp_file)  # Keep the file object in memory
-        return temp_file
-
-    def extract_from_rar(self, file_info):
+    def extractFileFromArchive(self, file_info):
         try:
-            temp_dir = tempfile.mkdtemp()
-            patoolib.extract_archive(self.file_name, outdir=temp_dir, interactive=False)
-            extracted_path = os.path.join(temp_dir, file_info['filename'])
-            if os.path.exists(extracted_path):
-                with open(extracted_path, 'rb') as file:
-                    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file_info['filename'])[1])
-                    temp_file.write(file.read())
-                    temp_file.flush()
-                    self.temp_files.append(temp_file)  # Keep the file object in memory
-                shutil.rmtree(temp_dir)
-                return temp_file
+            return self.memberFile(file_info['entry'])
         except Exception as e:
             QMessageBox.warning(self, "Error", f"Failed to extract file: {str(e)}")
         return None
 
-
-    def extract_from_7z(self, file_info):
-        with py7zr.SevenZipFile(self.file_name, 'r') as sz_ref:
-            temp_dir = tempfile.mkdtemp()
-            sz_ref.extract(temp_dir, [file_info["filename"]])
-            extracted_path = os.path.join(temp_dir, file_info["filename"])
-            with open(extracted_path, 'rb') as file:
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file_info["filename"])[1])
-                temp_file.write(file.read())
-                temp_file.flush()
-                self.temp_files.append(temp_file)  # Keep the file object in memory
-            shutil.rmtree(temp_dir)
-        return temp_file
-
-    def extract_from_tar(self, file_info):
-        if file_info['is_dir']:
-            return None  # Skip directories
-        with tarfile.open(self.file_name, 'r:*') as tar_ref:
-            member = tar_ref.getmember(file_info['filename'])
-            with tar_ref.extractfile(member) as file:
-                temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file_info['filename'])[1])
-                temp_file.write(file.read())
-                temp_file.flush()
-                self.temp_files.append(temp_file)  # Keep the file object in memory
-        return temp_file
-    def extract_generic(self, file_info):
+    def memberFile(self, entry):
+        # Small members go straight into memory; only large ones are extracted to disk
+        backend, filename = self.backendFor(entry)
+        key = self.memberKey(entry)
+        if self.archive_index.sizes[entry] <= SPILL_THRESHOLD:
+            return VirtualFile(filename, backend.read(filename), key=key)
+        temp_dir = tempfile.mkdtemp()
         try:
-            temp_dir = tempfile.mkdtemp()
-            
-            # Try different extraction methods
-            extraction_methods = [
-                self.extract_with_patoolib,
-                self.extract_with_rarfile,
-                self.extract_with_zipfile,
-                self.extract_with_7z
-            ]
-            
-            extracted = False
-            for method in extraction_methods:
-                try:
-                    method(temp_dir)
-                    extracted = True
-                    break  # If extraction succeeds, break the loop
-                except Exception as e:
-                    print(f"Extraction method {method.__name__} failed: {str(e)}")
-                    continue  # If this method fails, try the next one
-            
-            if not extracted:
-                raise Exception("Failed to extract with all available methods")
-
-            extracted_path = os.path.join(temp_dir, file_info['filename'])
-            if os.path.exists(extracted_path):
-                with open(extracted_path, 'rb') as file:
-                    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(file_info['filename'])[1])
-                    temp_file.write(file.read())
-                    temp_file.flush()
-                    self.temp_files.append(temp_file)  # Keep the file object in memory
-                return temp_file
-            else:
+            backend.extract([filename], temp_dir)
+            extracted_path = os.path.join(temp_dir, filename)
+            if not os.path.exists(extracted_path):
                 raise FileNotFoundError(f"Extracted file not found: {extracted_path}")
-        except Exception as e:
-            QMessageBox.warning(self, "Error", f"Failed to extract file: {str(e)}")
+            return VirtualFile.from_extracted(filename, extracted_path, key=key)
         finally:
-            if 'temp_dir' in locals():
-                shutil.rmtree(temp_dir, ignore_errors=True)
-        return None
-
-    def extract_with_patoolib(self, temp_dir):
-        patoolib.extract_archive(self.file_name, outdir=temp_dir, interactive=False)
-
-    def extract_with_7z(self, temp_dir):
-        with py7zr.SevenZipFile(self.file_name, mode='r') as z:
-            z.extractall(temp_dir)
-
-    def extract_with_zipfile(self, temp_dir):
-        with zipfile.ZipFile(self.file_name, 'r') as zip_ref:
-            zip_ref.extractall(temp_dir)
+            shutil.rmtree(temp_dir, ignore_errors=True)
 
-    def extract_with_rarfile(self, temp_dir):
-        with rarfile.RarFile(self.file_name, 'r') as rar_ref:
-            rar_ref.extractall(temp_dir)
+    def selectedArchiveFiles(self):
+        # Checked files win; without any, fall back to the selection, where a selected folder means all files below it
+        archive_index = self.archive_index
+        entries = set(self.archive_model.checked)
+        if not entries:
+            for index in self.tree.selectionModel().selectedRows(0):
+                entries.update(archive_index.files_under(self.archive_model.entry(index)))
+        return sorted(entries)
+
+    def extractionGroups(self, entries, dest_dir):
+        # One (backend, members, dest_dir) group per archive; members of nested archives land in a folder
+        # named after the nested archive
+        archive_index = self.archive_index
+        grouped = {}
+        for entry in entries:
+            grouped.setdefault(archive_index.container(entry), []).append(entry)
+        groups = []
+        for container, members in grouped.items():
+            backend = self.nestedBackend(container) if container else self.archive_backend
+            target = os.path.join(dest_dir, os.path.splitext(archive_index.path(container))[0]) if container else dest_dir
+            groups.append((backend, [(archive_index.member_path(entry), archive_index.sizes[entry],
+                                      archive_index.offsets[entry]) for entry in members], target))
+        return groups
 
     def extractSelected(self):
+        if not hasattr(self, 'archive_model'):
+            return  # The archive could not be read
+        entries = self.selectedArchiveFiles()
+        if not entries:
+            QMessageBox.information(self, "Nothing Selected", "Check or select the files to extract first.")
+            return
         selected_dir = QFileDialog.getExistingDirectory(self, "Select Directory for Extraction")
-        if selected_dir:
-            try:
-                # Try different extraction methods
-                extraction_methods = [
-                    self.extract_with_patoolib,
-                    self.extract_with_7z,
-                    self.extract_with_zipfile,
-                    self.extract_with_rarfile
-                ]
-                
-                extracted = False
-                for method in extraction_methods:
-                    try:
-                        method(selected_dir)
-                        extracted = True
-                        break  # If extraction succeeds, break the loop
-                    except Exception as e:
-                        print(f"Extraction method {method.__name__} failed: {str(e)}")
-                        continue  # If this method fails, try the next one
-                
-                if not extracted:
-                    raise Exception("Failed to extract with all available methods")
-
-                QMessageBox.information(self, "Extraction Complete", "Selected files have been extracted.")
-            except Exception as e:
-                QMessageBox.warning(self, "Extraction Error", f"Failed to extract files: {str(e)}")
+        if not selected_dir:
+            return
+        try:
+            groups = self.extractionGroups(entries, selected_dir)
+        except Exception as e:
+            QMessageBox.warning(self, "Extraction Error", f"Failed to open nested archive: {str(e)}")
+            return
+
+        self.extraction_dialog = QProgressDialog("Extracting...", "Cancel", 0, 1000, self)
+        self.extraction_dialog.setWindowTitle("Extracting")
+        self.extraction_dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        self.extraction_dialog.setMinimumDuration(0)
+        self.extraction_dialog.setAutoClose(False)
+        self.extraction_dialog.setAutoReset(False)
+
+        self.extraction_thread = ExtractionThread(groups, self)
+        self.extraction_errors = []
+        self.extraction_thread.progress.connect(self.extractionProgress)
+        self.extraction_thread.failed.connect(self.extraction_errors.append)
+        self.extraction_thread.finished.connect(self.extractionFinished)
+        self.extraction_dialog.canceled.connect(self.extraction_thread.cancel)
+        self.extraction_thread.start()
+
+    def extractionProgress(self, done_bytes, total_bytes, done_entries, total_entries):
+        if total_bytes:
+            self.extraction_dialog.setValue(int(done_bytes * 1000 / total_bytes))
+        else:
+            self.extraction_dialog.setValue(int(done_entries * 1000 / max(total_entries, 1)))
+        self.extraction_dialog.setLabelText(
+            f"Extracted {done_entries} of {total_entries} files ({self.formatSize(done_bytes)} of {self.formatSize(total_bytes)})")
+
+    def extractionFinished(self):
+        cancelled = self.extraction_dialog.wasCanceled()
+        self.extraction_dialog.close()
+        if self.extraction_errors:
+            QMessageBox.warning(self, "Extraction Error", f"Failed to extract files: {self.extraction_errors[0]}")
+        elif cancelled:
+            QMessageBox.information(self, "Extraction Cancelled", "Extraction was cancelled.")
+        else:
+            QMessageBox.information(self, "Extraction Complete", "Selected files have been extracted.")
 
     def formatSize(self, size_in_bytes):
         """Format the size in a human-readable format (B/KB/MB/GB/TB)."""
@@ -713,7 +685,13 @@ class FileViewer(QMainWindow):
 
     def displayGIF(self):
         self.gif_label = QLabel(self)
-        self.movie = QMovie(self.file_name)
+        if self.virtual_file is not None:
+            self.gif_buffer = QBuffer(self)
+            self.gif_buffer.setData(self.virtual_file.read_bytes())
+            self.gif_buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+            self.movie = QMovie(self.gif_buffer, b"gif")
+        else:
+            self.movie = QMovie(self.file_name)
         self.gif_label.setMovie(self.movie)
         self.gif_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.layout.addWidget(self.gif_label)
@@ -725,29 +703,92 @@ class FileViewer(QMainWindow):
 
     def displayImage(self):
         self.image_label = QLabel(self)
-        self.pixmap = QPixmap(self.file_name)
+        if self.virtual_file is not None:
+            self.pixmap = QPixmap()
+            self.pixmap.loadFromData(self.virtual_file.read_bytes())
+        else:
+            self.pixmap = QPixmap(self.file_name)
         self.image_label.setPixmap(self.pixmap)
         self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.layout.addWidget(self.image_label)
 
+    def fileSize(self):
+        return self.virtual_file.size if self.virtual_file is not None else os.path.getsize(self.file_name)
+
     def displayText(self):
-        with open(self.file_name, 'r', encoding='utf-8') as file:
-            content = file.read()
+        if self.fileSize() > LARGE_TEXT_SIZE:
+            self.displayLargeText()
+            return
+        content = self.readText()
         self.text_edit = QTextEdit(self)
         self.text_edit.setPlainText(content)
         self.text_edit.setReadOnly(True)
         font = QFont("Consolas", 12)
         self.text_edit.setFont(font)
+        language = language_for(self.file_name, content)
+        if language:
+            self.highlighter = LazyHighlighter(self.text_edit, get_lexer(language))
         self.layout.addWidget(self.text_edit)
 
+    def displayLargeText(self):
+        # Nothing is decoded up front; lines are found through an index built in the background
+        if self.virtual_file is not None:
+            buffer = self.virtual_file.getbuffer()
+        else:
+            buffer = self.text_map = map_file(self.file_name)
+        self.large_text_viewer = LargeTextViewer(buffer, self)
+        self.setCentralWidget(self.large_text_viewer)
+
+    def searchTarget(self):
+        # Covers plain text and hex views, plus highlighted code and decompiled classes, which end up in text_edit
+        if hasattr(self, 'large_text_viewer'):
+            return self.large_text_viewer
+        if hasattr(self, 'hex_viewer'):
+            return self.hex_viewer
+        if hasattr(self, 'text_edit'):
+            if getattr(self, 'text_search_target', None) is None:
+                self.text_search_target = TextEditSearchTarget(self.text_edit)
+            return self.text_search_target
+        return None
+
+    def openFindBar(self):
+        target = self.searchTarget()
+        if target is None:
+            return
+        if not hasattr(self, 'find_bar'):
+            self.find_bar = FindBar(self)
+            self.addToolBar(Qt.ToolBarArea.BottomToolBarArea, self.find_bar)
+        if self.find_bar.target is not target:
+            self.find_bar.setTarget(target)
+        self.find_bar.activate()
+
+    def toggleFollow(self, following):
+        if hasattr(self, 'tail_viewer'):
+            self.tail_viewer.setFollowing(following)
+            return
+        # The first switch replaces the static view, which setCentralWidget deletes
+        if hasattr(self, 'large_text_viewer'):
+            self.large_text_viewer.stopIndexing()
+            del self.large_text_viewer
+        if hasattr(self, 'text_edit'):
+            del self.text_edit
+        if hasattr(self, 'find_bar'):
+            self.find_bar.close()
+            self.find_bar.target = None
+        self.text_search_target = None
+        self.tail_viewer = TextTailViewer(self.file_name, self)
+        self.setCentralWidget(self.tail_viewer)
+
     def displayHTML(self):
         self.web_view = QWebEngineView(self)
-        self.web_view.load(QUrl.fromLocalFile(self.file_name))
+        if self.virtual_file is not None and self.virtual_file.size <= MAX_SET_HTML_SIZE:
+            self.web_view.setHtml(self.readText())
+        else:
+            self.web_view.load(QUrl.fromLocalFile(self.localPath()))
         self.layout.addWidget(self.web_view)
 
     def displayMarkdown(self):
-        with open(self.file_name, 'r', encoding='utf-8') as file:
-            content = file.read()
+        content = self.readText()
         html_content = markdown.markdown(content)
         self.web_view = QWebEngineView(self)
         styled_html = f"""
@@ -766,21 +807,41 @@ class FileViewer(QMainWindow):
         self.layout.addWidget(self.web_view)
 
     def displayPDF(self):
-        self.pdf_widget = QWidget()
-        self.pdf_layout = QVBoxLayout(self.pdf_widget)
-        self.layout.addWidget(self.pdf_widget)
-
-        self.doc = fitz.open(self.file_name)
-        self.pdf_labels = []
-        for page in self.doc:
-            pix = page.get_pixmap()
-            img = QImage(pix.samples, pix.width, pix.height, pix.stride, QImage.Format.Format_RGB888)
-            pixmap = QPixmap.fromImage(img)
-            label = QLabel()
-            label.setPixmap(pixmap)
-            label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            self.pdf_layout.addWidget(label)
-            self.pdf_labels.append(label)
+        if self.virtual_file is not None and self.virtual_file.in_memory():
+            source = self.virtual_file.read_bytes()
+        else:
+            source = self.localPath()
+        self.pdf_viewer = PDFViewer(source, self.cacheKey())
+        self.setCentralWidget(self.pdf_viewer)
+
+    def displayHex(self):
+        try:
+            if self.virtual_file is not None:
+                buffer = self.virtual_file.getbuffer()
+            else:
+                buffer = self.text_map = map_file(self.file_name)
+        except OSError:
+            self.displayUnsupported()
+            return
+        self.hex_viewer = HexViewer(buffer, self)
+        self.setCentralWidget(self.hex_viewer)
+
+        toolbar = QToolBar()
+        self.addToolBar(toolbar)
+        offset_edit = QLineEdit()
+        offset_edit.setPlaceholderText("Go to offset (0x1F40 or 8000)")
+        offset_edit.setMaximumWidth(200)
+        offset_edit.returnPressed.connect(lambda: self.goToOffset(offset_edit))
+        toolbar.addWidget(offset_edit)
+
+    def goToOffset(self, offset_edit):
+        try:
+            found = self.hex_viewer.goToOffset(parse_offset(offset_edit.text()))
+        except ValueError:
+            found = False
+        if not found:
+            QMessageBox.warning(self, "Go to Offset",
+                                f"Enter an offset below {self.hex_viewer.size:,} (0x{self.hex_viewer.size:X}).")
 
     def displayUnsupported(self):
         label = QLabel("Unsupported file type", self)
@@ -797,6 +858,11 @@ class FileViewer(QMainWindow):
         self.applyZoom()
 
     def applyZoom(self):
+        if hasattr(self, 'tail_viewer'):
+            font = self.tail_viewer.font()
+            font.setPointSizeF(12 * self.zoom_level)
+            self.tail_viewer.setFont(font)
+            return
         if hasattr(self, 'image_label'):
             scaled_pixmap = self.pixmap.scaled(self.pixmap.size() * self.zoom_level, 
                                                Qt.AspectRatioMode.KeepAspectRatio, 
@@ -808,17 +874,56 @@ class FileViewer(QMainWindow):
             self.text_edit.setFont(font)
         elif hasattr(self, 'web_view'):
             self.web_view.setZoomFactor(self.zoom_level)
-        elif hasattr(self, 'pdf_labels'):
-            for i, label in enumerate(self.pdf_labels):
-                page = self.doc[i]
-                pix = page.get_pixmap(matrix=fitz.Matrix(self.zoom_level, self.zoom_level))
-                img = QImage(pix.samples, pix.width, pix.height, pix.stride, QImage.Format.Format_RGB888)
-                pixmap = QPixmap.fromImage(img)
-                label.setPixmap(pixmap)
+        elif hasattr(self, 'pdf_viewer'):
+            self.pdf_viewer.setZoom(self.zoom_level)
+            return
+        elif hasattr(self, 'large_text_viewer'):
+            font = self.large_text_viewer.font()
+            font.setPointSizeF(12 * self.zoom_level)
+            self.large_text_viewer.setFont(font)
+            return
+        elif hasattr(self, 'hex_viewer'):
+            font = self.hex_viewer.font()
+            font.setPointSizeF(12 * self.zoom_level)
+            self.hex_viewer.setFont(font)
+            return
 
         self.content_widget.adjustSize()
+
+    def closeEvent(self, event):
+        if hasattr(self, 'pdf_viewer'):
+            self.pdf_viewer.stopRendering()
+        if hasattr(self, 'find_bar'):
+            self.find_bar.cancelSearch()
+        if hasattr(self, 'large_text_viewer'):
+            self.large_text_viewer.stopIndexing()
+        if hasattr(self, 'tail_viewer'):
+            self.tail_viewer.stopFollowing()
+        if hasattr(self, 'ndjson_viewer'):
+            self.ndjson_viewer.stop()
+        if hasattr(self, 'json_viewer'):
+            self.json_viewer.stop()
+        if hasattr(self, 'pe_viewer'):
+            self.pe_viewer.close_file()
+        if hasattr(self, 'text_map') and self.text_map:
+            self.text_map.close()
+        if hasattr(self, 'extraction_thread'):
+            self.extraction_thread.cancel()
+            self.extraction_thread.wait()
+        if hasattr(self, 'archive_backend'):
+            self.archive_backend.close()
+        for backend in getattr(self, 'nested_backends', {}).values():
+            backend.close()
+        for nested_file in getattr(self, 'nested_files', []):
+            nested_file.close()
+        if self.virtual_file is not None:
+            self.virtual_file.close()
+        super().closeEvent(event)
 if __name__ == '__main__':
     mimetypes.init()
+    for extension in ['.jsonl', '.ndjson']:
+        mimetypes.add_type('application/x-ndjson', extension)
+    mimetypes.add_type('text/plain', '.log')  # Not known to mimetypes, yet what follow mode is for
     app = QApplication(sys.argv)
     ex = MainWindow()
     ex.show()